@@ -0,0 +1,46 @@
+import contextlib
+import multiprocessing
+import os
+import queue
+
+# Сообщение процесса расчета о том, что он закончил
+DONE = "done"
+
+
+def _run(target, args, messages, cancel) -> None:
+    # Печать решателей не должна попадать в терминал интерфейса
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        try:
+            target(messages.put, cancel, *args)
+        finally:
+            messages.put(DONE)
+
+
+def run_solver(target, args: tuple, on_message, cancel) -> None:
+    """
+    Выполняет target(send, cancel, *args) в отдельном процессе, чтобы
+    расчет не отнимал GIL у интерфейса. Каждое send(message) передается
+    в on_message в вызывающем потоке. cancel - multiprocessing.Event,
+    target должен проверять его сам. Возвращается, когда target закончил
+    """
+    messages = multiprocessing.Queue()
+    process = multiprocessing.Process(
+        target=_run, args=(target, args, messages, cancel), daemon=True
+    )
+    process.start()
+    try:
+        while True:
+            try:
+                message = messages.get(timeout=0.1)
+            except queue.Empty:
+                if process.is_alive():
+                    continue
+                # Процесс завершился аварийно и не прислал DONE
+                break
+            if message == DONE:
+                break
+            on_message(message)
+    finally:
+        process.join(timeout=1)
+        if process.is_alive():
+            process.terminate()
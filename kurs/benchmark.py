@@ -0,0 +1,268 @@
+"""
+Замеры производительности решателей, функций потерь и симулятора.
+
+    python benchmark.py run -o results.json
+    python benchmark.py compare baseline.json results.json
+
+Каждый замер - функция на одном размере парка и длительности рейса
+с фиксированным зерном. Результат в json: время (лучшее из repeats),
+пиковая память по tracemalloc (отдельным прогоном, чтобы трассировка
+не искажала время), вычислений в секунду и качество решения
+(потеря или fitness, меньше - лучше). С --telemetry решатели
+прогоняются еще раз с Telemetry, и ее фазы и счетчики попадают в отчет
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+import brute_force.brute_force as bf
+import genetic.generative_algo as ga
+from problem import DEFAULT_SPEC, Telemetry
+
+SEED = 0
+FLEET_SIZES = (10, 20, 50, 200)
+ROUTE_DURATIONS = (60, 90)
+# Функции-ядра повторяются, пока суммарное время меньше этого, секунды
+MIN_KERNEL_TIME = 0.2
+# Допустимый рост времени и памяти при сравнении, доля
+THRESHOLD = 0.2
+
+
+def bench_simulator(num_buses: int, spec):
+    buses = [bf.Bus(i) for i in range(1, num_buses + 1)]
+
+    def call():
+        # Симуляция меняет состояние водителей, поэтому они каждый раз новые
+        drivers = bf.make_drivers(num_buses, num_buses // 2)
+        schedule = bf.generate_schedule_per_day(drivers, buses, spec)
+        return 1, bf.combined_loss(schedule, len(drivers), spec)
+
+    return call
+
+
+def bench_combined_loss(num_buses: int, spec):
+    drivers = bf.make_drivers(num_buses, num_buses // 2)
+    buses = [bf.Bus(i) for i in range(1, num_buses + 1)]
+    schedule = bf.generate_schedule_per_day(drivers, buses, spec)
+    return lambda: (1, bf.combined_loss(schedule, len(drivers), spec))
+
+
+def bench_fitness(num_buses: int, spec):
+    drivers = [ga.Driver("B", i) for i in range(1, num_buses)]
+    schedule = ga.generate_one_schedule(drivers, spec)
+    return lambda: (1, ga.fitness(schedule, spec))
+
+
+def bench_brute_force(num_buses: int, spec, telemetry=None) -> tuple[int, float]:
+    stats = {}
+    _, loss, _ = bf.brute_force_schedule(
+        num_buses,
+        timedelta(minutes=spec.route_duration),
+        stats=stats,
+        spec=spec,
+        telemetry=telemetry,
+    )
+    return stats["simulated"] + stats["pruned_early"], loss
+
+
+def bench_genetic(num_buses: int, spec, telemetry=None) -> tuple[int, float]:
+    stats = {}
+    schedule = ga.genetic_algorithm(
+        num_buses,
+        timedelta(minutes=spec.route_duration),
+        spec=spec,
+        stats=stats,
+        telemetry=telemetry,
+    )
+    minutes = [(driver_id, spec.to_minutes(time)) for driver_id, time in schedule]
+    return stats["fitness_evaluations"], ga.fitness(minutes, spec)
+
+
+# Ядра возвращают функцию одного вызова (подготовка не замеряется),
+# остальные выполняются целиком
+KERNELS = {
+    "combined_loss": bench_combined_loss,
+    "fitness": bench_fitness,
+    "generate_schedule_per_day": bench_simulator,
+}
+SOLVERS = {
+    "brute_force_schedule": bench_brute_force,
+    "genetic_algorithm": bench_genetic,
+}
+
+
+def measure(
+    name: str, num_buses: int, route: int, repeats: int, telemetry: bool = False
+) -> dict:
+    spec = DEFAULT_SPEC.replace(route_duration=route)
+
+    def run(telemetry=None):
+        random.seed(SEED)
+        if name in KERNELS:
+            call = KERNELS[name](num_buses, spec)
+            calls = 0
+            started = time.perf_counter()
+            while True:
+                _, quality = call()
+                calls += 1
+                wall = time.perf_counter() - started
+                if wall >= MIN_KERNEL_TIME:
+                    return calls, quality, wall / calls
+        started = time.perf_counter()
+        evaluations, quality = SOLVERS[name](num_buses, spec, telemetry)
+        return evaluations, quality, time.perf_counter() - started
+
+    walls = []
+    # Решатели печатают ход поиска, а stdout может быть занят отчетом
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(repeats):
+            evaluations, quality, wall = run()
+            walls.append(wall)
+        tracemalloc.start()
+        try:
+            run()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        if telemetry and name in SOLVERS:
+            telemetry = Telemetry()
+            run(telemetry)
+    wall = min(walls)
+    if name in KERNELS:
+        # У ядер время - на один вызов
+        evaluations = 1
+    result = {
+        "name": name,
+        "buses": num_buses,
+        "route": route,
+        "wall": wall,
+        "peak_kib": peak / 1024,
+        "evals_per_sec": evaluations / wall if wall else None,
+        "quality": quality,
+    }
+    if isinstance(telemetry, Telemetry):
+        result["telemetry"] = telemetry.to_dict()
+    return result
+
+
+def run_suite(
+    names: list[str],
+    sizes: list[int],
+    routes: list[int],
+    repeats: int = 1,
+    verbose: bool = True,
+    telemetry: bool = False,
+) -> dict:
+    results = []
+    for name in names:
+        for num_buses in sizes:
+            for route in routes:
+                result = measure(name, num_buses, route, repeats, telemetry)
+                results.append(result)
+                if verbose:
+                    print(format_result(result), file=sys.stderr)
+    return {
+        "meta": {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "seed": SEED,
+            "repeats": repeats,
+        },
+        "results": results,
+    }
+
+
+def format_result(result: dict) -> str:
+    return (
+        f"{result['name']:<26} buses={result['buses']:<4} route={result['route']:<4}"
+        f" wall={result['wall']:.6f}s peak={result['peak_kib']:.0f}KiB"
+        f" evals/s={result['evals_per_sec']:.0f} quality={result['quality']}"
+    )
+
+
+def compare(baseline: dict, current: dict, threshold: float = THRESHOLD) -> list[str]:
+    """
+    Сравнивает два прогона по одинаковым замерам. Регрессия - время
+    или память выросли больше чем на threshold, либо качество стало хуже
+    """
+    regressions = []
+    known = {
+        (result["name"], result["buses"], result["route"]): result
+        for result in baseline["results"]
+    }
+    for result in current["results"]:
+        key = (result["name"], result["buses"], result["route"])
+        before = known.get(key)
+        if before is None:
+            continue
+        case = f"{key[0]} buses={key[1]} route={key[2]}"
+        for metric in ("wall", "peak_kib"):
+            if result[metric] > before[metric] * (1 + threshold):
+                regressions.append(
+                    f"{case}: {metric} {before[metric]:.6g} -> {result[metric]:.6g}"
+                    f" ({result[metric] / before[metric] - 1:+.0%})"
+                )
+        if result["quality"] > before["quality"]:
+            regressions.append(
+                f"{case}: quality {before['quality']} -> {result['quality']}"
+            )
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="выполнить замеры")
+    run_parser.add_argument("-o", "--output", help="файл json (по умолчанию stdout)")
+    run_parser.add_argument(
+        "--only", nargs="+", choices=[*KERNELS, *SOLVERS], default=[*KERNELS, *SOLVERS]
+    )
+    run_parser.add_argument("--sizes", nargs="+", type=int, default=FLEET_SIZES)
+    run_parser.add_argument("--routes", nargs="+", type=int, default=ROUTE_DURATIONS)
+    run_parser.add_argument("--repeats", type=int, default=1)
+    run_parser.add_argument(
+        "--telemetry", action="store_true", help="добавить фазы и счетчики решателей"
+    )
+
+    compare_parser = commands.add_parser("compare", help="сравнить с базовым прогоном")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=THRESHOLD)
+
+    args = parser.parse_args(argv)
+    if args.command == "run":
+        report = run_suite(
+            args.only, args.sizes, args.routes, args.repeats, telemetry=args.telemetry
+        )
+        text = json.dumps(report, indent=2, ensure_ascii=False)
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as file:
+                file.write(text + "\n")
+        else:
+            print(text)
+        return 0
+
+    with open(args.baseline, encoding="utf-8") as file:
+        baseline = json.load(file)
+    with open(args.current, encoding="utf-8") as file:
+        current = json.load(file)
+    regressions = compare(baseline, current, args.threshold)
+    for line in regressions:
+        print(line)
+    if not regressions:
+        print("Регрессий нет")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1 +1,19 @@
-from .brute_force import brute_force_schedule, display_one_day
+from .brute_force import (
+    brute_force_iter,
+    brute_force_schedule,
+    display_one_day,
+    generate_schedule_memo,
+)
+from .dp import generate_schedule_dp
+from .events import generate_schedule_events, simulate_day_events
+from .memo import DAY_CACHE, DayCache
+from .replan import (
+    BUS_OUT_OF_SERVICE,
+    DRIVER_UNAVAILABLE,
+    ROUTE_DELAY,
+    DayReplanner,
+    Disruption,
+    replan_day,
+)
+from .rosters import exhaustive_schedule
+from .week import Departure, WeekSchedule
@@ -1,6 +1,17 @@
 # @title
+import math
+import os
+import time
 from datetime import datetime, timedelta
 from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from problem import DEFAULT_SPEC, ProblemSpec, ResultCache, Telemetry, to_minutes
+from problem.telemetry import phase
+
+from .memo import DAY_CACHE, DayCache
+from .week import WeekSchedule
 
 
 # Классы
@@ -10,9 +21,9 @@ class Driver:
         self.id = id
 
         self.remaining_hours = 9 if driver_type == "A" else 21  # Рабочие часы для типа
-        self.next_available_time = START_TIME  # Время, когда водитель будет доступен
+        self.next_available_time = 0  # Минута, когда водитель будет доступен
         self.first_day = 1  # Первый рабочий день на неделе
-        self.start_time: datetime = None
+        self.start_time: int = None
         self.route_count = 0
         self.current_bus: Bus = None
 
@@ -24,280 +35,957 @@ class Bus:
 
 
 class Shift:
-    def __init__(self, driver, bus, start_time):
+    def __init__(self, driver, bus, minute, spec=DEFAULT_SPEC):
         self.driver: Driver = driver
         self.bus: Bus = bus
-        self.start_time: datetime = start_time
+        self.minute: int = minute  # Минуты от начала работы
+        self.spec: ProblemSpec = spec
 
-    def __str__(self):
-        print(self.start_time.strftime("%H:%M:%S"))
-        return f"Водитель-{self.driver.id} Автобус-{self.bus.id} Выезд-{self.start_time.strftime("%H:%M:%S")}"
+    @property
+    def start_time(self) -> datetime:
+        return self.spec.to_datetime(self.minute)
 
+    def __str__(self):
+        return f"Водитель-{self.driver.id} Автобус-{self.bus.id} Выезд-{self.start_time.strftime('%H:%M:%S')}"
 
-# Параметры задачи
-START_TIME = datetime.strptime("06:00", "%H:%M")
-END_TIME = datetime.strptime("03:00", "%H:%M") + timedelta(days=1)
-PEAK_HOURS = [
-    (datetime.strptime("07:00", "%H:%M"), datetime.strptime("09:00", "%H:%M")),
-    (datetime.strptime("17:00", "%H:%M"), datetime.strptime("19:00", "%H:%M")),
-]
 
+# Параметры задачи (время, часы пик, интервалы и веса) - в ProblemSpec
 NUM_BUSES = 50
 buses = [Bus(i) for i in range(1, NUM_BUSES)]
 
 ROUTE_DURATION = timedelta(minutes=60)
-LUNCH_DURATION = timedelta(minutes=60)
-BREAK_DURATION = timedelta(minutes=15)
-
-PEAK_MAX_WAIT = 10  # Минуты
-NON_PEAK_MAX_WAIT = 20  # Минуты
 DAYS = [i for i in range(0, 7)]
+# Версия ответа перебора для ResultCache: увеличить, если ответ
+# или его формат изменится
+SOLVER_VERSION = 4
 
 
 # Функция потерь
-def combined_loss(
-    schedule,
-    peak_intervals,
-    non_peak_max_wait,
-    peak_max_wait,
-    drivers_count,
-    driver_weight=1.0,
-    waiting_weight=1.0,
-) -> float:
+def combined_loss(schedule, drivers_count, spec: ProblemSpec = DEFAULT_SPEC) -> float:
     waiting_loss = 0
+    loss_wait = spec.loss_wait
     for day_schedule in schedule:
-        waiting_loss += max(0, (60 - len(day_schedule))) * 1000
+        waiting_loss += (
+            max(0, (spec.min_departures - len(day_schedule))) * spec.missing_penalty
+        )
         for i in range(len(day_schedule) - 1):
-            current_time = day_schedule[i].start_time
-            next_time = day_schedule[i + 1].start_time
-            interval = (
-                next_time - current_time
-            ).total_seconds() / 60  # Интервал в минутах
-
-            is_peak = any(start <= current_time < end for start, end in peak_intervals)
-            max_wait = peak_max_wait if is_peak else non_peak_max_wait
+            current_time = day_schedule[i].minute
+            interval = day_schedule[i + 1].minute - current_time  # Интервал в минутах
 
+            max_wait = loss_wait[current_time]
             if interval > max_wait:
                 waiting_loss += (interval - max_wait) ** 2
 
     driver_loss = drivers_count**2
-    total_loss = waiting_weight * waiting_loss + driver_weight * driver_loss
+    total_loss = spec.waiting_weight * waiting_loss + spec.driver_weight * driver_loss
     return total_loss
 
 
-# Brute Force алгоритм
-def brute_force_schedule(
-    num_buses: int, route_duration: timedelta
-) -> tuple[list[list[Shift]], float, list[int]]:
+def count_per_day(drivers: list[Driver]) -> list[int]:
+    cnt = [0 for i in range(7)]
+    for day in DAYS:
+        for driver in drivers:
+            if driver.type == "A" and driver.first_day <= day < driver.first_day + 5:
+                cnt[day] += 1
+            elif driver.type == "B" and (
+                driver.first_day == day or driver.first_day + 5 == day
+            ):
+                cnt[day] += 1
+    return cnt
+
+
+def make_drivers(count_drivers: int, count_drivers_a: int) -> list[Driver]:
     """
-    Для сгенерированных комбинаций водителей по дням
-    мы составляем расписание на каждый день с учетом того, сколько
-    сегодня работает водителей каждого типа.
-    Затем считаем функцию потерь и сравниваем оптимальность
+    Создает водителей для одной комбинации и распределяет их первые рабочие дни
     """
-    best_loss = 100000000000000000
-    best_schedule = None
-    best_count = []
+    count_drivers_b = count_drivers - count_drivers_a
+    drivers_a = [Driver("A", i) for i in range(1, count_drivers_a + 1)]
+    driver_b = [Driver("B", i + count_drivers_a) for i in range(1, count_drivers_b + 1)]
+    # Распределяем большую часть на будние, небольшую - на выходные
+    distibution = [0.4, 0.3, 0.3]
+    sum_d = [int(distibution[0] * count_drivers_a)]
+    for i in range(1, 3):
+        sum_d.append(int(distibution[i] * count_drivers_a) + sum_d[i - 1])
+    sum_d[-1] = count_drivers_a
+    pos_d = 0
+    for i, da in enumerate(drivers_a):
+        if i > sum_d[pos_d]:
+            pos_d += 1
+        da.first_day = DAYS[pos_d]
+    for i, db in enumerate(driver_b):
+        db.first_day = DAYS[i % 4]
+    return drivers_a + driver_b
+
+
+def drivers_on_duty(drivers: list[Driver], day: int) -> list[Driver]:
+    """
+    Выбирает водителей, работающих в этот день, и возвращает начальный
+    дек свободных водителей
+    """
+    today_drivers_a, today_drivers_b = [], []
+    for driver in drivers:
+        # Обнуляем пройденные маршруты для водителя
+        driver.route_count = 0
+        driver.start_time = None
+        if driver.type == "A" and driver.first_day <= day < driver.first_day + 5:
+            today_drivers_a.append(driver)
+        if driver.type == "B" and (
+            driver.first_day == day or driver.first_day + 3 == day
+        ):
+            today_drivers_b.append(driver)
 
-    def count_per_day(drivers):
-        cnt = [0 for i in range(7)]
-        for day in DAYS:
-            for driver in drivers:
-                if (
-                    driver.type == "A"
-                    and driver.first_day <= day < driver.first_day + 5
-                ):
-                    cnt[day] += 1
-                elif driver.type == "B" and (
-                    driver.first_day == day or driver.first_day + 5 == day
-                ):
-                    cnt[day] += 1
-        return cnt
-
-    def generate_schedule_per_day(drivers: list[Driver], buses: list[Bus]):
-        nonlocal best_loss
-        nonlocal best_schedule
-        nonlocal best_count
-        schedule = [[] for i in range(7)]
-        for day in DAYS:
-            """
-            Каждые 10 минут мы проверяем состояние
-            Если это не час пик, мы ждем, пока не наберется 20 минут
-            Если через час начнется час пик, то мы начинаем отправлять автобусы с частотой 10 минут
-            """
-            current_time = datetime.strptime("06:00", "%H:%M")
-            last_bus_time = datetime.strptime("03:00", "%H:%M")
-
-            today_drivers_a, today_drivers_b = [], []
-            for driver in drivers:
-                # Обнуляем пройденные маршруты для водителя
-                driver.route_count = 0
-                driver.start_time = None
-                if (
-                    driver.type == "A"
-                    and driver.first_day <= day < driver.first_day + 5
-                ):
-                    today_drivers_a.append(driver)
-                if driver.type == "B" and (
-                    driver.first_day == day or driver.first_day + 3 == day
-                ):
-                    today_drivers_b.append(driver)
-
-            """
-            Дек содержит свободных водителей, причем сначала мы равномерно перемешиваем 
-            Так мы делаем, потому что нам лучше позже отправлять водителей типа B,
-            Чтобы они покрыли больше времени.
-            Водителей в пути мы же закидываем в очередь.(но дек)
-            А водителей на обеде или перерыве мы закидываем в дек, где
-            обед - это конец, а перерыв - начало
-            """
-
-            available_drivers = []
-            busy_drivers = deque()
-            lunch_drivers = deque()
-            break_drivers = deque()
-            available_buses = buses.copy()
-
-            for i in range(0, len(today_drivers_a) // 2):
-                available_drivers.append(today_drivers_a[i])
-
-            for i in range(0, len(today_drivers_b)):
-                available_drivers.append(today_drivers_b[i])
-
-            for i in range(len(today_drivers_a) // 2, len(today_drivers_a)):
-                available_drivers.append(today_drivers_a[i])
-
-            while current_time < END_TIME:
-                next_time = current_time + timedelta(minutes=PEAK_MAX_WAIT)
-                is_peak = any(
-                    start <= current_time < end
-                    or start <= current_time + route_duration < end
-                    for start, end in PEAK_HOURS
-                )
-                current_invterval = PEAK_MAX_WAIT if is_peak else NON_PEAK_MAX_WAIT
+    """
+    Дек содержит свободных водителей, причем сначала мы равномерно перемешиваем 
+    Так мы делаем, потому что нам лучше позже отправлять водителей типа B,
+    Чтобы они покрыли больше времени.
+    Водителей в пути мы же закидываем в очередь.(но дек)
+    А водителей на обеде или перерыве мы закидываем в дек, где
+    обед - это конец, а перерыв - начало
+    """
+    available_drivers = []
 
-                # Обновляем состояние водителей
-                while (
-                    len(busy_drivers) > 0
-                    and busy_drivers[0].next_available_time <= current_time
-                ):
-                    driver = busy_drivers.popleft()
-                    available_buses.append(driver.current_bus)
-                    # Проверить, нужен ли обед. Иначе - просто перерыв каждые два часа
-                    # Логика распределения водителей по обедам, перерывам и работе
-                    #
-                    if (
-                        driver.type == "A"
-                        and driver.start_time + timedelta(hours=driver.remaining_hours)
-                        >= current_time
-                    ):
-                        # Водитель отработал смену
-                        continue
-                    elif driver.route_count > 4:
-                        driver.next_available_time = current_time + LUNCH_DURATION
-                        lunch_drivers.append(driver)
-                    elif driver.route_count > 2:
-                        driver.next_available_time = current_time + BREAK_DURATION
-                        break_drivers.append(driver)
-                    else:
-                        driver.next_available_time = current_time
-                        available_drivers.append(driver)
-
-                while (
-                    len(lunch_drivers) > 0
-                    and lunch_drivers[0].next_available_time <= current_time
-                ):
-                    driver = lunch_drivers.popleft()
-                    driver.next_available_time = current_time
-                    available_drivers.append(driver)
+    for i in range(0, len(today_drivers_a) // 2):
+        available_drivers.append(today_drivers_a[i])
 
-                while (
-                    len(break_drivers) > 0
-                    and break_drivers[0].next_available_time <= current_time
-                ):
-                    driver = break_drivers.popleft()
-                    driver.next_available_time = current_time
-                    available_drivers.append(driver)
-
-                # Запускаем автобус, прошло достаточно времени с отправки последнего автобуса
-                if (
-                    current_time - last_bus_time
-                ).total_seconds() // 60 >= current_invterval:
-                    if len(available_drivers) == 0:
-                        # Если свободных водителей нет - ждем, когда он появится
-                        current_time = next_time
-                        continue
-                    if len(available_buses) == 0:
-                        # Если свободных автобусов нет - ждем, когда он появится
-                        current_time = next_time
-                        continue
-                    driver = available_drivers.pop()
-                    bus = available_buses.pop()
-                    if driver.start_time is None:
-                        driver.start_time = current_time
-
-                    driver.next_available_time = current_time + route_duration
-                    driver.route_count += 1
-                    driver.current_bus = bus
-                    busy_drivers.append(driver)
-                    last_bus_time = current_time
-                    schedule[day].append(Shift(driver, bus, current_time))
+    for i in range(0, len(today_drivers_b)):
+        available_drivers.append(today_drivers_b[i])
+
+    for i in range(len(today_drivers_a) // 2, len(today_drivers_a)):
+        available_drivers.append(today_drivers_a[i])
+    return available_drivers
+
+
+def release_drivers(
+    current_time: int,
+    busy_drivers: deque,
+    lunch_drivers: deque,
+    break_drivers: deque,
+    available_drivers: list[Driver],
+    available_buses: list[Bus],
+    spec: ProblemSpec,
+) -> None:
+    """
+    Обновляет состояние водителей: вернувшиеся из рейса уходят на обед,
+    перерыв или снова становятся свободными
+    """
+    while len(busy_drivers) > 0 and busy_drivers[0].next_available_time <= current_time:
+        driver = busy_drivers.popleft()
+        available_buses.append(driver.current_bus)
+        # Проверить, нужен ли обед. Иначе - просто перерыв каждые два часа
+        # Логика распределения водителей по обедам, перерывам и работе
+        #
+        if (
+            driver.type == "A"
+            and driver.start_time + driver.remaining_hours * 60 >= current_time
+        ):
+            # Водитель отработал смену
+            continue
+        elif driver.route_count > 4:
+            driver.next_available_time = current_time + spec.lunch_duration
+            lunch_drivers.append(driver)
+        elif driver.route_count > 2:
+            driver.next_available_time = current_time + spec.break_duration
+            break_drivers.append(driver)
+        else:
+            driver.next_available_time = current_time
+            available_drivers.append(driver)
+
+    while (
+        len(lunch_drivers) > 0 and lunch_drivers[0].next_available_time <= current_time
+    ):
+        driver = lunch_drivers.popleft()
+        driver.next_available_time = current_time
+        available_drivers.append(driver)
+
+    while (
+        len(break_drivers) > 0 and break_drivers[0].next_available_time <= current_time
+    ):
+        driver = break_drivers.popleft()
+        driver.next_available_time = current_time
+        available_drivers.append(driver)
+
+
+def dispatch_bus(
+    current_time: int,
+    available_drivers: list[Driver],
+    available_buses: list[Bus],
+    busy_drivers: deque,
+    spec: ProblemSpec,
+) -> Shift:
+    """
+    Отправляет в рейс последнего свободного водителя на свободном автобусе
+    """
+    driver = available_drivers.pop()
+    bus = available_buses.pop()
+    if driver.start_time is None:
+        driver.start_time = current_time
+
+    driver.next_available_time = current_time + spec.route_duration
+    driver.route_count += 1
+    driver.current_bus = bus
+    busy_drivers.append(driver)
+    return Shift(driver, bus, current_time, spec)
+
+
+def gap_penalty(current_time: int, next_time: int, spec: ProblemSpec) -> int:
+    """
+    Штраф combined_loss за интервал между двумя соседними выездами
+    """
+    interval = next_time - current_time
+    max_wait = spec.loss_wait[current_time]
+    if interval > max_wait:
+        return (interval - max_wait) ** 2
+    return 0
 
+
+def day_waiting_loss(day_schedule: list[Shift], spec: ProblemSpec) -> int:
+    """
+    Невзвешенная потеря от ожидания за один день, как в combined_loss
+    """
+    waiting_loss = (
+        max(0, (spec.min_departures - len(day_schedule))) * spec.missing_penalty
+    )
+    for i in range(len(day_schedule) - 1):
+        waiting_loss += gap_penalty(
+            day_schedule[i].minute, day_schedule[i + 1].minute, spec
+        )
+    return waiting_loss
+
+
+class DayState:
+    """
+    Состояние симуляции дня на момент current_time: деки водителей
+    в рейсе, на обеде и на перерыве, свободные водители и автобусы
+    и уже сделанные выезды. С ним день можно досчитать с середины
+    """
+
+    def __init__(self, available_drivers: list[Driver], buses: list[Bus], spec):
+        self.current_time = 0
+        # Последний автобус вчера ушел в момент окончания работы
+        self.last_bus_time = spec.horizon - 24 * 60
+        self.busy_drivers = deque()
+        self.lunch_drivers = deque()
+        self.break_drivers = deque()
+        self.available_drivers = available_drivers
+        self.available_buses = buses.copy()
+        self.day_schedule = []
+
+
+def advance_day(
+    state: DayState,
+    spec: ProblemSpec,
+    step: int,
+    until: int,
+    loss_limit: float | None = None,
+    waiting_loss: int = 0,
+) -> int | None:
+    """
+    Продолжает симуляцию state по шагам до момента until (не включая)
+    и возвращает накопленную потерю от ожидания или None, если она
+    достигла loss_limit
+    """
+    day_schedule = state.day_schedule
+    dispatch_wait = spec.dispatch_wait
+    current_time = state.current_time
+    last_bus_time = state.last_bus_time
+
+    busy_drivers = state.busy_drivers
+    lunch_drivers = state.lunch_drivers
+    break_drivers = state.break_drivers
+    available_drivers = state.available_drivers
+    available_buses = state.available_buses
+
+    while current_time < until:
+        next_time = current_time + step
+        current_invterval = dispatch_wait[current_time]
+
+        release_drivers(
+            current_time,
+            busy_drivers,
+            lunch_drivers,
+            break_drivers,
+            available_drivers,
+            available_buses,
+            spec,
+        )
+
+        # Запускаем автобус, прошло достаточно времени с отправки последнего автобуса
+        if current_time - last_bus_time >= current_invterval:
+            if len(available_drivers) == 0:
+                # Если свободных водителей нет - ждем, когда он появится
+                current_time = next_time
+                continue
+            if len(available_buses) == 0:
+                # Если свободных автобусов нет - ждем, когда он появится
                 current_time = next_time
+                continue
+            if loss_limit is not None and day_schedule:
+                waiting_loss += gap_penalty(last_bus_time, current_time, spec)
+                if spec.waiting_weight * waiting_loss >= loss_limit:
+                    return None
+            last_bus_time = current_time
+            day_schedule.append(
+                dispatch_bus(
+                    current_time,
+                    available_drivers,
+                    available_buses,
+                    busy_drivers,
+                    spec,
+                )
+            )
+
+        current_time = next_time
+
+    state.current_time = current_time
+    state.last_bus_time = last_bus_time
+    return waiting_loss
+
+
+def simulate_day(
+    available_drivers: list[Driver],
+    buses: list[Bus],
+    spec: ProblemSpec,
+    step: int,
+    loss_limit: float | None = None,
+    waiting_loss: int = 0,
+) -> tuple[list[Shift], int] | None:
+    """
+    Каждые 10 минут мы проверяем состояние
+    Если это не час пик, мы ждем, пока не наберется 20 минут
+    Если через час начнется час пик, то мы начинаем отправлять автобусы с частотой 10 минут
+
+    Возвращает выезды за день и накопленную потерю от ожидания
+    (она считается, только если задан loss_limit)
+    """
+    state = DayState(available_drivers, buses, spec)
+    waiting_loss = advance_day(
+        state, spec, step, spec.horizon, loss_limit, waiting_loss
+    )
+    if waiting_loss is None:
+        return None
+
+    if loss_limit is not None:
+        waiting_loss += (
+            max(0, (spec.min_departures - len(state.day_schedule)))
+            * spec.missing_penalty
+        )
+        if spec.waiting_weight * waiting_loss >= loss_limit:
+            return None
+    return state.day_schedule, waiting_loss
+
+
+def traced_simulate(telemetry: Telemetry, simulate=simulate_day):
+    """
+    simulate для generate_schedule_per_day с замером каждого дня:
+    фаза simulate_day, счетчики days_simulated, days_aborted и ticks
+    (шагов в досчитанных днях). Сами шаги не замеряются, чтобы без
+    telemetry симуляция не платила за проверки
+    """
+
+    def simulate_traced(
+        available_drivers, buses, spec, step, loss_limit=None, waiting_loss=0
+    ):
+        with telemetry.phase("simulate_day"):
+            result = simulate(
+                available_drivers, buses, spec, step, loss_limit, waiting_loss
+            )
+        if result is None:
+            telemetry.count("days_aborted")
+        else:
+            telemetry.count("days_simulated")
+            telemetry.count("ticks", -(-spec.horizon // step))
+        return result
+
+    return simulate_traced
+
+
+def generate_schedule_per_day(
+    drivers: list[Driver],
+    buses: list[Bus],
+    spec: ProblemSpec = DEFAULT_SPEC,
+    loss_limit: float | None = None,
+    step: int | None = None,
+    simulate=simulate_day,
+) -> list[list[Shift]] | None:
+    """
+    loss_limit - верхняя граница для взвешенной части потерь от ожидания.
+    Если она задана, по ходу симуляции считаются те же штрафы, что и в
+    combined_loss, и как только они достигают границы, симуляция
+    прерывается и возвращается None - такое расписание уже не станет лучшим
+
+    step - шаг проверки состояния в минутах (по умолчанию пиковый интервал)
+    simulate - симуляция одного дня (simulate_day или simulate_day_events)
+    """
+    step = step or spec.peak_max_wait
+    schedule = [[] for i in range(7)]
+    waiting_loss = 0
+    for day in DAYS:
+        available_drivers = drivers_on_duty(drivers, day)
+        result = simulate(
+            available_drivers, buses, spec, step, loss_limit, waiting_loss
+        )
+        if result is None:
+            return None
+        schedule[day], waiting_loss = result
+    return schedule
+
+
+def roster_signature(available_drivers: list[Driver]) -> tuple:
+    """
+    День зависит только от типов водителей в начальном деке и их порядка,
+    номера водителей влияют лишь на подписи в расписании
+    """
+    return tuple((driver.type, driver.remaining_hours) for driver in available_drivers)
+
+
+def generate_schedule_memo(
+    drivers: list[Driver],
+    buses: list[Bus],
+    spec: ProblemSpec = DEFAULT_SPEC,
+    loss_limit: float | None = None,
+    step: int | None = None,
+    simulate=simulate_day,
+    cache: DayCache | None = None,
+) -> list[list[Shift]] | None:
+    """
+    generate_schedule_per_day с кэшем дней. Ключ - сигнатура состава
+    водителей дня, в кэше хранятся позиции водителей в деке, номера
+    автобусов и минуты выездов, а также потеря дня. Поэтому каждый
+    различный состав симулируется один раз, а остальные кандидаты
+    только собирают расписание из кэша.
+    Дни симулируются целиком, граница loss_limit проверяется после каждого дня
+    """
+    cache = DAY_CACHE if cache is None else cache
+    step = step or spec.peak_max_wait
+    bus_index = {id(bus): i for i, bus in enumerate(buses)}
+    base_key = (simulate, spec.key, step, tuple(bus.id for bus in buses))
+    schedule = [[] for i in range(7)]
+    waiting_loss = 0
+    for day in DAYS:
+        available_drivers = drivers_on_duty(drivers, day)
+        key = (base_key, roster_signature(available_drivers))
+        entry = cache.get(key)
+        if entry is None:
+            position = {id(driver): i for i, driver in enumerate(available_drivers)}
+            # simulate забирает водителей из дека, поэтому передаем копию
+            day_schedule, _ = simulate(available_drivers.copy(), buses, spec, step)
+            entry = (
+                tuple(
+                    (position[id(s.driver)], bus_index[id(s.bus)], s.minute)
+                    for s in day_schedule
+                ),
+                day_waiting_loss(day_schedule, spec),
+            )
+            cache.put(key, entry)
+        else:
+            day_schedule = [
+                Shift(available_drivers[i], buses[b], minute, spec)
+                for i, b, minute in entry[0]
+            ]
+        schedule[day] = day_schedule
+        waiting_loss += entry[1]
+        if loss_limit is not None and spec.waiting_weight * waiting_loss >= loss_limit:
+            return None
+    return schedule
+
+
+def drivers_lower_bound(count_drivers: int, spec: ProblemSpec = DEFAULT_SPEC) -> float:
+    """
+    Слагаемое за водителей в combined_loss зависит только от их числа,
+    поэтому это нижняя граница потерь для любого расписания с count_drivers
+    """
+    return spec.driver_weight * count_drivers**2
+
+
+def evaluate_candidate(
+    count_drivers: int,
+    count_drivers_a: int,
+    spec: ProblemSpec = DEFAULT_SPEC,
+    best_loss: float | None = None,
+    engine=generate_schedule_per_day,
+    strict: bool = False,
+    telemetry: Telemetry | None = None,
+) -> tuple[float, list[list[Shift]], list[int]] | None:
+    """
+    Составляет расписание на неделю для одной комбинации водителей
+    и считает для него функцию потерь.
+    Если передан best_loss, то симуляция прерывается, как только становится
+    ясно, что лучше не получится, и тогда возвращается None.
+    engine - функция симуляции с сигнатурой generate_schedule_per_day.
+    strict - кандидат стоит в сетке раньше лучшего и при равной потере
+    выигрывает, поэтому прерывать можно только при строго большей потере.
+    telemetry - фазы simulate и loss
+    """
+    drivers = make_drivers(count_drivers, count_drivers_a)
+    loss_limit = None
+    if best_loss is not None:
+        loss_limit = best_loss - drivers_lower_bound(len(drivers), spec)
+        if strict:
+            loss_limit = math.nextafter(loss_limit, math.inf)
+    with phase(telemetry, "simulate"):
+        schedule = engine(drivers, buses, spec, loss_limit)
+    if schedule is None:
+        return None
+    with phase(telemetry, "loss"):
+        schedule_loss = combined_loss(schedule, len(drivers), spec)
+    return schedule_loss, schedule, count_per_day(drivers)
+
+
+def snapshot(
+    result: tuple[float, list[list[Shift]], list[int]],
+    spec: ProblemSpec,
+    count_drivers: int,
+    count_drivers_a: int,
+) -> tuple[float, WeekSchedule, list[int]]:
+    """
+    Результат evaluate_candidate со снимком расписания в WeekSchedule
+    вместе с составом водителей: берется, когда найдено новое лучшее
+    """
+    loss, schedule, count = result
+    drivers = make_drivers(count_drivers, count_drivers_a)
+    return loss, WeekSchedule.from_shifts(schedule, spec, drivers), count
+
+
+def row_pruned(
+    count_drivers: int, spec: ProblemSpec, best_loss: float, strict: bool
+) -> bool:
+    """
+    Можно ли отбросить оставшихся кандидатов с count_drivers водителями
+    только по слагаемому за водителей
+    """
+    bound = drivers_lower_bound(count_drivers, spec)
+    return bound > best_loss or (bound == best_loss and not strict)
+
+
+def search_drivers_count(
+    count_drivers: int,
+    spec: ProblemSpec = DEFAULT_SPEC,
+    best_loss: float | None = None,
+    engine=generate_schedule_per_day,
+    strict: bool = False,
+    skip: tuple[int, ...] = (),
+) -> tuple[tuple[float, WeekSchedule, list[int]] | None, int, dict[str, int]]:
+    """
+    Перебирает все разбиения count_drivers на водителей типа A и B
+    и возвращает лучшее из них, число водителей A в нем и счетчики перебора.
+    Функция модульная, чтобы ее можно было передать в пул процессов.
+
+    best_loss - лучшая известная потеря (None - без отсечений).
+    Кандидаты, которые не могут ее улучшить, отбрасываются.
+    strict - строка стоит в сетке раньше лучшего кандидата.
+    skip - уже просчитанные значения count_drivers_a
+    """
+    best = None
+    best_a = None
+    counters = {"simulated": 0, "pruned_bound": 0, "pruned_early": 0}
+    cache_hits, cache_misses = DAY_CACHE.hits, DAY_CACHE.misses
+    for count_drivers_a in range(0, count_drivers + 1):
+        if count_drivers_a in skip:
+            continue
+        # Пока в строке ничего не найдено, сравниваем с лучшим из других строк
+        row_strict = strict and best is None
+        if best_loss is not None and row_pruned(
+            count_drivers, spec, best_loss, row_strict
+        ):
+            counters["pruned_bound"] += sum(
+                1 for a in range(count_drivers_a, count_drivers + 1) if a not in skip
+            )
+            break
+        result = evaluate_candidate(
+            count_drivers, count_drivers_a, spec, best_loss, engine, row_strict
+        )
+        if result is None:
+            counters["pruned_early"] += 1
+            continue
+        counters["simulated"] += 1
+        if best is None or result[0] < best[0]:
+            best = snapshot(result, spec, count_drivers, count_drivers_a)
+            best_a = count_drivers_a
+            if best_loss is not None:
+                best_loss = result[0]
+    # Кэш у каждого процесса свой, поэтому возвращаем прирост его счетчиков
+    counters["cache_hits"] = DAY_CACHE.hits - cache_hits
+    counters["cache_misses"] = DAY_CACHE.misses - cache_misses
+    return best, best_a, counters
+
+
+def promising_order(counts: list[int], center: int) -> list[int]:
+    """
+    Порядок обхода строк: сначала ближайшие к самому удачному числу водителей
+    """
+    return sorted(counts, key=lambda count: (abs(count - center), count))
+
+
+# Сколько строк сетки пробуется в начале, чтобы найти перспективное число водителей
+PROBES = 8
+
+
+def brute_force_iter(
+    num_buses: int,
+    route_duration: timedelta,
+    workers: int | None = 1,
+    bound: bool = True,
+    stats: dict | None = None,
+    engine=generate_schedule_per_day,
+    spec: ProblemSpec | None = None,
+    deadline: float | None = None,
+    time_budget: float | None = None,
+    progress=None,
+    cancel=None,
+    cache: ResultCache | None = None,
+    telemetry: Telemetry | None = None,
+):
+    """
+    Генератор для brute_force_schedule: отдает (loss, schedule, best_count)
+    каждый раз, когда найдено расписание лучше предыдущего.
+    schedule - снимок WeekSchedule, поэтому лучшие расписания не держат
+    объекты Shift, Driver и Bus. Его roster - состав водителей, с ним
+    расписание можно перепланировать через DayReplanner(schedule, day).
+
+    Сначала пробуется по одному кандидату в PROBES строках сетки,
+    затем строки обходятся от самой удачной из них к краям.
+    Так хорошее расписание появляется почти сразу, а граница
+    становится тесной с самого начала. Кандидаты сравниваются по паре
+    (потеря, место в сетке), поэтому при равных потерях побеждает тот же
+    кандидат, что и при обходе по порядку, и последний ответ совпадает
+    с полным перебором.
+
+    workers - число процессов. При workers=1 перебор идет в текущем процессе,
+    при workers=None берется число ядер. Строки сетки (count_drivers)
+    независимы, каждой передается граница из уже слитых строк,
+    а новые лучшие отдаются по мере слияния строк.
+
+    bound - метод ветвей и границ. Строки, у которых слагаемое за водителей
+    само по себе не меньше лучшей потери, отсекаются без симуляции.
+    Внутри строки симуляция прерывается, как только частичная потеря
+    от ожидания превышает лучшую. Отсекаются только кандидаты, которые не
+    могут стать лучше, поэтому ответ тот же, что и при полном переборе.
+
+    deadline - момент по time.monotonic(), time_budget - бюджет в секундах.
+    Когда время выходит, генератор просто заканчивается.
+
+    stats - если передан словарь, в него записываются счетчики:
+    candidates - размер сетки, simulated - полностью просчитано,
+    pruned_bound - отсечено по числу водителей без симуляции,
+    pruned_early - симуляция прервана досрочно,
+    cache_hits / cache_misses / cache_hit_rate - обращения к кэшу дней
+    (для engine=generate_schedule_memo), timed_out - кончилось время.
+
+    engine - функция симуляции: generate_schedule_per_day (шаговая),
+    generate_schedule_events (событийная) или generate_schedule_memo
+    (с кэшем дней). Для процессов она должна быть функцией модуля
+    (или functools.partial от нее)
+
+    spec - параметры задачи (по умолчанию DEFAULT_SPEC),
+    route_duration подставляется в них
+
+    progress - progress(count_drivers, count_drivers_a, best_loss) перед
+    каждым кандидатом (в пуле - после слияния строки, count_drivers_a=None).
+    cancel - объект с is_set() (например, threading.Event): когда он
+    установлен, генератор заканчивается, в stats - cancelled.
+    cache - ResultCache (например, problem.RESULT_CACHE): сначала ответ
+    ищется в нем, и тогда отдается сразу, а ответ полного перебора
+    (не прерванного по времени или отмене) сохраняется.
+    telemetry - Telemetry: фазы simulate и loss каждого кандидата
+    (для generate_schedule_per_day еще и simulate_day по дням), счетчики
+    из stats и события "candidate" (count_drivers, count_drivers_a, loss -
+    None, если симуляция прервана, best_loss). В пуле процессов замеры
+    внутри строк не собираются, вместо "candidate" - событие "row"
+    """
+    if cache is not None:
+        yield from cached_brute_force(
+            cache,
+            num_buses,
+            route_duration,
+            workers=workers,
+            bound=bound,
+            stats=stats,
+            engine=engine,
+            spec=spec,
+            deadline=deadline,
+            time_budget=time_budget,
+            progress=progress,
+            cancel=cancel,
+            telemetry=telemetry,
+        )
+        return
+    spec = (spec or DEFAULT_SPEC).replace(route_duration=to_minutes(route_duration))
+    if time_budget is not None:
+        budget_end = time.monotonic() + time_budget
+        deadline = budget_end if deadline is None else min(deadline, budget_end)
+
+    # Первые дни водителей здесь фиксированы (make_drivers),
+    # полный перебор первых дней - в rosters.exhaustive_schedule
+
+    counts = list(range(4, num_buses + 1))
+    counters = {
+        "candidates": sum(c + 1 for c in counts),
+        "simulated": 0,
+        "pruned_bound": 0,
+        "pruned_early": 0,
+        "cache_hits": 0,
+        "cache_misses": 0,
+        "timed_out": False,
+        "cancelled": False,
+    }
+    cache_hits, cache_misses = DAY_CACHE.hits, DAY_CACHE.misses
+    if telemetry is not None and engine is generate_schedule_per_day and workers == 1:
+        engine = partial(engine, simulate=traced_simulate(telemetry))
+    best_loss = 100000000000000000
+    best_key = (num_buses + 1, 0)  # Место лучшего кандидата в сетке
+
+    def expired() -> bool:
+        if cancel is not None and cancel.is_set():
+            counters["cancelled"] = True
+            return True
+        if deadline is not None and time.monotonic() >= deadline:
+            counters["timed_out"] = True
+            return True
+        return False
+
+    def improves(loss, key) -> bool:
         """
-        Теперь у нас есть сгенерированное на неделю расписание
-        Остается только сравнить его эффективность 
+        При равных потерях лучше кандидат, который раньше стоит в сетке
         """
-        schedule_loss = combined_loss(
-            schedule,
-            PEAK_HOURS,
-            NON_PEAK_MAX_WAIT,
-            PEAK_MAX_WAIT,
-            len(drivers),
-            10.0,
-            4.0,
+        return loss < best_loss or (loss == best_loss and key < best_key)
+
+    def try_candidate(key, strict):
+        """
+        Просчитывает кандидата key и возвращает снимок, если он лучше
+        лучшего, иначе None. strict - key стоит в сетке раньше лучшего
+        """
+        nonlocal best_loss, best_key
+        if progress is not None:
+            progress(*key, best_loss)
+        result = evaluate_candidate(
+            *key, spec, best_loss if bound else None, engine, strict, telemetry
         )
-        if schedule_loss < best_loss:
-            best_loss = schedule_loss
-            best_schedule = schedule
-            best_count = count_per_day(drivers)
-
-    # Первым делом - составить график водителей на неделю
-    # def recursive_days(drivers: list[Driver], x: int):
-    #     if x == len(drivers):
-    #         # В это месте мы вызываем generate_schedule_per_day
-    #         # print([(d.id, d.type, d.first_day) for d in drivers])
-    #         generate_schedule_per_day(drivers, buses)
-    #         return
-    #     for i in range(0, 3):
-    #         drivers[x].first_day = DAYS[i]
-    #         recursive_days(drivers, x + 1)
-
-    for count_drivers in range(4, num_buses + 1):
+        if telemetry is not None:
+            telemetry.event(
+                "candidate",
+                count_drivers=key[0],
+                count_drivers_a=key[1],
+                loss=None if result is None else result[0],
+                best_loss=best_loss,
+            )
+        if result is None:
+            counters["pruned_early"] += 1
+            return None
+        counters["simulated"] += 1
+        if not improves(result[0], key):
+            return None
+        best_loss, best_key = result[0], key
+        return snapshot(result, spec, *key)
+
+    def candidates(count_drivers, skip):
+        """
+        Кандидаты строки по порядку, пока строку нельзя отсечь целиком
+        """
         for count_drivers_a in range(0, count_drivers + 1):
-            count_drivers_b = count_drivers - count_drivers_a
-            drivers_a = [Driver("A", i) for i in range(1, count_drivers_a + 1)]
-            driver_b = [
-                Driver("B", i + count_drivers_a) for i in range(1, count_drivers_b + 1)
-            ]
-            # Распределяем большую часть на будние, небольшую - на выходные
-            distibution = [0.4, 0.3, 0.3]
-            sum_d = [int(distibution[0] * count_drivers_a)]
-            for i in range(1, 3):
-                sum_d.append(int(distibution[i] * count_drivers_a) + sum_d[i - 1])
-            sum_d[-1] = count_drivers_a
-            pos_d = 0
-            for i, da in enumerate(drivers_a):
-                if i > sum_d[pos_d]:
-                    pos_d += 1
-                da.first_day = DAYS[pos_d]
-            for i, db in enumerate(driver_b):
-                db.first_day = DAYS[i % 4]
-
-            drivers = drivers_a + driver_b
-            generate_schedule_per_day(drivers, buses)
-
-            # recursive_days(drivers, 0)
+            if count_drivers_a in skip:
+                continue
+            key = (count_drivers, count_drivers_a)
+            strict = key < best_key
+            if bound and row_pruned(count_drivers, spec, best_loss, strict):
+                counters["pruned_bound"] += sum(
+                    1 for a in range(count_drivers_a, count_drivers + 1) if a not in skip
+                )
+                return
+            yield key, strict
+
+    pool = None
+    pending = deque()
+    try:
+        # Пробные кандидаты - по одному в нескольких строках
+        probed = {}
+        for count_drivers in counts[:: max(1, len(counts) // PROBES)]:
+            key = (count_drivers, count_drivers // 2)
+            strict = key < best_key
+            if bound and row_pruned(count_drivers, spec, best_loss, strict):
+                # Строка будет отсечена целиком при основном обходе
+                continue
+            if expired():
+                return
+            probed[count_drivers] = (key[1],)
+            best = try_candidate(key, strict)
+            if best is not None:
+                yield best
+
+        center = best_key[0] if best_key[0] <= num_buses else counts[len(counts) // 2]
+        order = promising_order(counts, center)
+
+        if workers == 1:
+            for count_drivers in order:
+                for key, strict in candidates(
+                    count_drivers, probed.get(count_drivers, ())
+                ):
+                    if expired():
+                        return
+                    best = try_candidate(key, strict)
+                    if best is not None:
+                        yield best
+            return
+
+        # Строки отправляются в пул окном, и граница для каждой строки
+        # берется из уже слитых строк
+        pool = ProcessPoolExecutor(max_workers=workers)
+        window = workers or os.cpu_count()
+        rows = iter(order)
+        while True:
+            if expired():
+                return
+            while len(pending) < window:
+                count_drivers = next(rows, None)
+                if count_drivers is None:
+                    break
+                skip = probed.get(count_drivers, ())
+                strict = (count_drivers, 0) < best_key
+                if bound and row_pruned(count_drivers, spec, best_loss, strict):
+                    counters["pruned_bound"] += count_drivers + 1 - len(skip)
+                    continue
+                limit = best_loss if bound else None
+                future = pool.submit(
+                    search_drivers_count,
+                    count_drivers,
+                    spec,
+                    limit,
+                    engine,
+                    strict,
+                    skip,
+                )
+                pending.append((count_drivers, future))
+            if not pending:
+                return
+
+            count_drivers, future = pending.popleft()
+            timeout = None
+            if deadline is not None:
+                timeout = max(0.0, deadline - time.monotonic())
+            try:
+                best, best_a, row_counters = future.result(timeout=timeout)
+            except TimeoutError:
+                counters["timed_out"] = True
+                return
+            for name, value in row_counters.items():
+                counters[name] += value
+            if progress is not None:
+                progress(count_drivers, None, best_loss)
+            if telemetry is not None:
+                telemetry.event(
+                    "row",
+                    count_drivers=count_drivers,
+                    loss=None if best is None else best[0],
+                    best_loss=best_loss,
+                )
+            if best is not None and improves(best[0], (count_drivers, best_a)):
+                best_loss, best_key = best[0], (count_drivers, best_a)
+                yield best
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+        counters["cache_hits"] += DAY_CACHE.hits - cache_hits
+        counters["cache_misses"] += DAY_CACHE.misses - cache_misses
+        lookups = counters["cache_hits"] + counters["cache_misses"]
+        counters["cache_hit_rate"] = (
+            counters["cache_hits"] / lookups if lookups else 0.0
+        )
+        if stats is not None:
+            stats.update(counters)
+        if telemetry is not None:
+            for name, value in counters.items():
+                if not isinstance(value, (bool, float)):
+                    telemetry.count(name, value)
+
+
+def cached_brute_force(
+    cache: ResultCache,
+    num_buses: int,
+    route_duration: timedelta,
+    stats: dict | None = None,
+    engine=generate_schedule_per_day,
+    spec: ProblemSpec | None = None,
+    **options,
+):
+    """
+    brute_force_iter через кэш. Ключ - число автобусов, параметры задачи
+    и engine; workers и bound на ответ не влияют. stats получает
+    result_cached - был ли ответ взят из кэша
+    """
+    spec = (spec or DEFAULT_SPEC).replace(route_duration=to_minutes(route_duration))
+    key = cache.key(
+        "brute_force", SOLVER_VERSION, num_buses=num_buses, spec=spec, engine=engine
+    )
+    cached = cache.get(key)
+    if cached is not None:
+        if stats is not None:
+            stats["result_cached"] = True
+        if options.get("telemetry") is not None:
+            options["telemetry"].count("result_cached")
+        schedule = WeekSchedule.from_dict(cached["schedule"], spec)
+        yield cached["loss"], schedule, cached["count"]
+        return
+
+    counters = {}
+    best = None
+    try:
+        for best in brute_force_iter(
+            num_buses,
+            route_duration,
+            stats=counters,
+            engine=engine,
+            spec=spec,
+            **options,
+        ):
+            yield best
+    finally:
+        if stats is not None:
+            stats.update(counters)
+            stats["result_cached"] = False
+    if best is not None and not counters["timed_out"] and not counters["cancelled"]:
+        loss, schedule, count = best
+        cache.put(
+            key, {"loss": loss, "schedule": schedule.to_dict(), "count": count}
+        )
+
+
+# Brute Force алгоритм
+def brute_force_schedule(
+    num_buses: int,
+    route_duration: timedelta,
+    workers: int | None = 1,
+    bound: bool = True,
+    stats: dict | None = None,
+    engine=generate_schedule_per_day,
+    spec: ProblemSpec | None = None,
+    time_budget: float | None = None,
+    cache: ResultCache | None = None,
+    telemetry: Telemetry | None = None,
+) -> tuple[WeekSchedule, float, list[int]]:
+    """
+    Для сгенерированных комбинаций водителей по дням
+    мы составляем расписание на каждый день с учетом того, сколько
+    сегодня работает водителей каждого типа.
+    Затем считаем функцию потерь и сравниваем оптимальность
+
+    Параметры - как у brute_force_iter, возвращается последнее
+    (лучшее) найденное расписание
+    """
+    best_schedule = None
+    best_loss = 100000000000000000
+    best_count = []
+    for best_loss, best_schedule, best_count in brute_force_iter(
+        num_buses,
+        route_duration,
+        workers,
+        bound,
+        stats,
+        engine,
+        spec,
+        time_budget=time_budget,
+        cache=cache,
+        telemetry=telemetry,
+    ):
+        pass
     return best_schedule, best_loss, best_count
 
 
@@ -317,5 +1005,5 @@ if __name__ == "__main__":
         print(day)
         print("-----------")
         for s in day_s:
-            print(s.driver.id, s.bus.id, s.start_time)
+            print(s.driver_id, s.bus_id, s.start_time)
         print("-----------")
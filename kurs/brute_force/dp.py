@@ -0,0 +1,39 @@
+from problem import DEFAULT_SPEC, ProblemSpec
+from problem.timetable import optimal_timetable
+
+from .brute_force import DAYS, Bus, Driver, Shift, drivers_on_duty
+
+
+def generate_schedule_dp(
+    drivers: list[Driver],
+    buses: list[Bus],
+    spec: ProblemSpec = DEFAULT_SPEC,
+    loss_limit: float | None = None,
+    step: int | None = None,
+) -> list[list[Shift]] | None:
+    """
+    Движок для brute_force_schedule (engine=generate_schedule_dp):
+    вместо симуляции каждый день получает точное расписание выездов
+    optimal_timetable для числа водителей на смене (но не больше числа
+    автобусов). Выезды раздаются водителям и автобусам по кругу.
+    Обеды и перерывы симулятора здесь не учитываются - только то,
+    что водитель и автобус заняты на время рейса.
+
+    step - шаг сетки выездов в минутах (по умолчанию 5).
+    loss_limit - как в generate_schedule_per_day, проверяется после каждого дня
+    """
+    step = step or 5
+    schedule = [[] for i in range(7)]
+    waiting_loss = 0
+    for day in DAYS:
+        available_drivers = drivers_on_duty(drivers, day)
+        capacity = min(len(available_drivers), len(buses))
+        day_loss, minutes = optimal_timetable(capacity, spec, "loss", step)
+        schedule[day] = [
+            Shift(available_drivers[i % capacity], buses[i % capacity], minute, spec)
+            for i, minute in enumerate(minutes)
+        ]
+        waiting_loss += day_loss
+        if loss_limit is not None and spec.waiting_weight * waiting_loss >= loss_limit:
+            return None
+    return schedule
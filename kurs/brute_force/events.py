@@ -0,0 +1,142 @@
+import heapq
+from collections import deque
+
+from problem import DEFAULT_SPEC, ProblemSpec
+
+from .brute_force import (
+    Bus,
+    Driver,
+    Shift,
+    dispatch_bus,
+    gap_penalty,
+    generate_schedule_per_day,
+    release_drivers,
+)
+
+
+def ceil_to_step(minute: int, step: int) -> int:
+    """
+    Округляет минуту вверх до ближайшего шага сетки
+    """
+    return -(-minute // step) * step
+
+
+def next_departure_slot(
+    last_bus_time: int, after: int, step: int, spec: ProblemSpec
+) -> int:
+    """
+    Первый шаг сетки не раньше after, на котором с последнего выезда
+    прошел нужный интервал. Пиковый интервал короче обычного, поэтому
+    это либо первый пиковый шаг после last_bus_time + peak_max_wait,
+    либо первый шаг после last_bus_time + non_peak_max_wait
+    """
+    slot = ceil_to_step(max(after, last_bus_time + spec.non_peak_max_wait), step)
+    lower = max(after, last_bus_time + spec.peak_max_wait)
+    for start, end in spec.dispatch_windows:
+        candidate = ceil_to_step(max(lower, start), step)
+        if candidate < end and candidate < slot:
+            slot = candidate
+    return slot
+
+
+def simulate_day_events(
+    available_drivers: list[Driver],
+    buses: list[Bus],
+    spec: ProblemSpec,
+    step: int,
+    loss_limit: float | None = None,
+    waiting_loss: int = 0,
+) -> tuple[list[Shift], int] | None:
+    """
+    Событийная версия simulate_day.
+    Вместо проверки состояния на каждом шаге время сразу перескакивает
+    к ближайшему событию из кучи: возвращению водителя из рейса, концу
+    обеда или перерыва, либо следующему моменту, когда можно отправить автобус.
+    Все события округляются до сетки с шагом step, поэтому при одинаковом
+    шаге расписание совпадает с шаговым движком, а число итераций
+    зависит от числа событий, а не от шага
+    """
+    day_schedule = []
+    dispatch_wait = spec.dispatch_wait
+    # Последний автобус вчера ушел в момент окончания работы
+    last_bus_time = spec.horizon - 24 * 60
+
+    busy_drivers = deque()
+    lunch_drivers = deque()
+    break_drivers = deque()
+    available_buses = buses.copy()
+
+    events = [0]
+    current_time = -1
+    while events:
+        time = heapq.heappop(events)
+        if time <= current_time:
+            # Повторное событие на уже обработанный момент
+            continue
+        if time >= spec.horizon:
+            break
+        current_time = time
+
+        release_drivers(
+            current_time,
+            busy_drivers,
+            lunch_drivers,
+            break_drivers,
+            available_drivers,
+            available_buses,
+            spec,
+        )
+
+        if (
+            current_time - last_bus_time >= dispatch_wait[current_time]
+            and available_drivers
+            and available_buses
+        ):
+            if loss_limit is not None and day_schedule:
+                waiting_loss += gap_penalty(last_bus_time, current_time, spec)
+                if spec.waiting_weight * waiting_loss >= loss_limit:
+                    return None
+            last_bus_time = current_time
+            day_schedule.append(
+                dispatch_bus(
+                    current_time,
+                    available_drivers,
+                    available_buses,
+                    busy_drivers,
+                    spec,
+                )
+            )
+
+        # Деки упорядочены по времени освобождения,
+        # поэтому в кучу достаточно положить их головы
+        for queue in (busy_drivers, lunch_drivers, break_drivers):
+            if queue:
+                heapq.heappush(events, ceil_to_step(queue[0].next_available_time, step))
+        if available_drivers and available_buses:
+            heapq.heappush(
+                events,
+                next_departure_slot(last_bus_time, current_time + step, step, spec),
+            )
+
+    if loss_limit is not None:
+        waiting_loss += (
+            max(0, (spec.min_departures - len(day_schedule))) * spec.missing_penalty
+        )
+        if spec.waiting_weight * waiting_loss >= loss_limit:
+            return None
+    return day_schedule, waiting_loss
+
+
+def generate_schedule_events(
+    drivers: list[Driver],
+    buses: list[Bus],
+    spec: ProblemSpec = DEFAULT_SPEC,
+    loss_limit: float | None = None,
+    step: int | None = None,
+) -> list[list[Shift]] | None:
+    """
+    generate_schedule_per_day на событийном движке
+    """
+    return generate_schedule_per_day(
+        drivers, buses, spec, loss_limit, step, simulate_day_events
+    )
@@ -0,0 +1,233 @@
+import copy
+import heapq
+from collections import deque
+from datetime import datetime, timedelta
+
+from problem import ProblemSpec, to_minutes
+
+from .brute_force import (
+    Bus,
+    DayState,
+    Driver,
+    advance_day,
+    buses,
+    drivers_on_duty,
+    release_drivers,
+)
+from .events import ceil_to_step
+from .week import WeekSchedule
+
+DRIVER_UNAVAILABLE = "driver"
+BUS_OUT_OF_SERVICE = "bus"
+ROUTE_DELAY = "delay"
+
+
+class Disruption:
+    """
+    Событие посреди дня:
+    DRIVER_UNAVAILABLE - водитель target больше не выходит в рейсы,
+    BUS_OUT_OF_SERVICE - автобус target больше не выходит в рейсы,
+    ROUTE_DELAY - рейсы в пути (автобуса target или все, если target
+    не задан) вернутся на delay позже.
+    Водитель или автобус в рейсе сначала заканчивает этот рейс
+    """
+
+    def __init__(
+        self, kind: str, target: int | None = None, delay: timedelta | int = 0
+    ):
+        if kind not in (DRIVER_UNAVAILABLE, BUS_OUT_OF_SERVICE, ROUTE_DELAY):
+            raise ValueError(f"Неизвестное событие: {kind}")
+        if target is None and kind != ROUTE_DELAY:
+            raise ValueError(f"Для события {kind} нужен target")
+        self.kind = kind
+        self.target = target
+        self.delay = to_minutes(delay)
+
+
+def clock_minute(now: datetime | int, spec: ProblemSpec) -> int:
+    """
+    Минута от начала работы: время суток после полуночи
+    относится к концу рабочего дня
+    """
+    if not isinstance(now, datetime):
+        return int(now)
+    minute = spec.to_minutes(datetime.combine(spec.start.date(), now.time()))
+    return minute + 24 * 60 if minute < 0 else minute
+
+
+def forget(state: DayState, disruption: Disruption) -> None:
+    """
+    Убирает водителя или автобус из событий из всех мест,
+    откуда их можно отправить в рейс
+    """
+    if disruption.kind == DRIVER_UNAVAILABLE:
+        for drivers in (
+            state.available_drivers,
+            state.lunch_drivers,
+            state.break_drivers,
+        ):
+            for driver in [d for d in drivers if d.id == disruption.target]:
+                drivers.remove(driver)
+    else:
+        for bus in [b for b in state.available_buses if b.id == disruption.target]:
+            state.available_buses.remove(bus)
+
+
+def on_trip(state: DayState, disruption: Disruption) -> list[Driver]:
+    """
+    Водители в рейсе, которых касается событие
+    """
+    if disruption.kind == DRIVER_UNAVAILABLE:
+        return [d for d in state.busy_drivers if d.id == disruption.target]
+    # target=None бывает только у ROUTE_DELAY - тогда все рейсы
+    return [
+        d for d in state.busy_drivers if disruption.target in (None, d.current_bus.id)
+    ]
+
+
+def replay_day(
+    state: DayState,
+    spec: ProblemSpec,
+    step: int,
+    events: list[tuple[int, Disruption]],
+) -> None:
+    """
+    Досчитывает день state до конца, применяя события (минута, Disruption)
+    в их моменты. Водителя или автобус в рейсе событие убирает на шаге,
+    когда рейс закончится и release_drivers вернет их
+    """
+    # (минута, порядок, событие, водитель в рейсе, которого ждем, или None)
+    queue = [(minute, i, event, None) for i, (minute, event) in enumerate(events)]
+    heapq.heapify(queue)
+    order = len(queue)
+    while queue and queue[0][0] < spec.horizon:
+        minute, _, event, driver = heapq.heappop(queue)
+        advance_day(state, spec, step, minute)
+        if driver is not None:
+            release_drivers(
+                state.current_time,
+                state.busy_drivers,
+                state.lunch_drivers,
+                state.break_drivers,
+                state.available_drivers,
+                state.available_buses,
+                spec,
+            )
+            if driver in state.busy_drivers:
+                # Рейс задержали после события - ждем дальше
+                returned = ceil_to_step(driver.next_available_time, step)
+                heapq.heappush(queue, (returned, order, event, driver))
+                order += 1
+            else:
+                forget(state, event)
+            continue
+
+        if event.kind == ROUTE_DELAY:
+            for delayed in on_trip(state, event):
+                delayed.next_available_time += event.delay
+            # release_drivers ждет, что дек упорядочен по времени возвращения
+            state.busy_drivers = deque(
+                sorted(state.busy_drivers, key=lambda d: d.next_available_time)
+            )
+            continue
+        forget(state, event)
+        for busy in on_trip(state, event):
+            returned = ceil_to_step(busy.next_available_time, step)
+            heapq.heappush(queue, (returned, order, event, busy))
+            order += 1
+    advance_day(state, spec, step, spec.horizon)
+
+
+def roster_drivers(roster: tuple[tuple[int, str, int], ...]) -> list[Driver]:
+    """
+    Водители из WeekSchedule.roster в том же порядке
+    """
+    drivers = []
+    for driver_id, driver_type, first_day in roster:
+        driver = Driver(driver_type, driver_id)
+        driver.first_day = first_day
+        drivers.append(driver)
+    return drivers
+
+
+class DayReplanner:
+    """
+    Перепланирование одного дня schedule по ходу дня.
+    Водители берутся из schedule.roster (его заполняют решатели перебора),
+    drivers нужен, только если состав в расписании неизвестен.
+    buses - автобусы, из которых построено schedule. Сами drivers и buses
+    не меняются. Каждое событие досчитывает только день day: симуляция
+    повторяется с начала дня со всеми событиями в их моменты, поэтому
+    деки водителей в рейсе, на обеде и на перерыве те же, что были бы
+    в симуляторе, а выезды до события остаются как были
+    """
+
+    def __init__(
+        self,
+        schedule: WeekSchedule,
+        day: int,
+        drivers: list[Driver] | None = None,
+        buses: list[Bus] = buses,
+        step: int | None = None,
+    ):
+        if drivers is None:
+            if schedule.roster is None:
+                raise ValueError("В расписании нет состава водителей, нужен drivers")
+            drivers = roster_drivers(schedule.roster)
+        self.schedule = schedule
+        self.drivers = drivers
+        self.day = day
+        self.buses = buses
+        self.spec = schedule.spec
+        self.step = step or self.spec.peak_max_wait
+        self.events = []
+
+    def replan(self, now: datetime | int, disruption: Disruption) -> WeekSchedule:
+        """
+        Применяет disruption в момент now (минута от начала работы или
+        время суток) и возвращает новое расписание недели. События идут
+        по времени. ValueError, если target неизвестен или выезды
+        до now не совпадают с симуляцией (другие drivers или buses)
+        """
+        now = clock_minute(now, self.spec)
+        if self.events and now < self.events[-1][0]:
+            raise ValueError("События должны идти по времени")
+        if disruption.target is not None:
+            ids = (
+                [driver.id for driver in self.drivers]
+                if disruption.kind == DRIVER_UNAVAILABLE
+                else [bus.id for bus in self.buses]
+            )
+            if disruption.target not in ids:
+                raise ValueError(f"Нет {disruption.kind} {disruption.target}")
+
+        # Водители меняются при симуляции, поэтому работаем с копиями
+        drivers = [copy.copy(driver) for driver in self.drivers]
+        state = DayState(drivers_on_duty(drivers, self.day), self.buses, self.spec)
+        replay_day(state, self.spec, self.step, [*self.events, (now, disruption)])
+
+        rows = [(s.driver.id, s.bus.id, s.minute) for s in state.day_schedule]
+        made = [row for row in rows if row[2] < now]
+        planned = [tuple(row) for row in self.schedule.rows(self.day) if row[2] < now]
+        if made != planned:
+            raise ValueError(
+                f"Выезды дня {self.day} до {now} не совпадают с симуляцией"
+            )
+        self.events.append((now, disruption))
+        self.schedule = self.schedule.with_day(self.day, rows)
+        return self.schedule
+
+
+def replan_day(
+    schedule: WeekSchedule,
+    day: int,
+    now: datetime | int,
+    disruption: Disruption,
+    drivers: list[Driver] | None = None,
+    buses: list[Bus] = buses,
+    step: int | None = None,
+) -> WeekSchedule:
+    """
+    Одно событие: DayReplanner(...).replan(now, disruption)
+    """
+    return DayReplanner(schedule, day, drivers, buses, step).replan(now, disruption)
@@ -0,0 +1,204 @@
+from datetime import timedelta
+from functools import lru_cache
+
+import numpy as np
+
+from problem import DEFAULT_SPEC, ProblemSpec, to_minutes
+
+from .brute_force import (
+    DAYS,
+    Driver,
+    buses,
+    combined_loss,
+    count_per_day,
+    day_waiting_loss,
+    drivers_lower_bound,
+    drivers_on_duty,
+    generate_schedule_memo,
+    simulate_day,
+)
+from .week import WeekSchedule
+
+# Возможные первые дни: водитель A работает 5 дней подряд,
+# водитель B - в первый день и через три дня, и все это должно уместиться в неделю
+START_DAYS_A = (0, 1, 2)
+START_DAYS_B = (0, 1, 2, 3)
+
+
+@lru_cache(maxsize=256)
+def compositions(total: int, parts: int) -> np.ndarray:
+    """
+    Все способы разложить total одинаковых водителей по parts первым дням.
+    Возвращает массив формы (число способов, parts) в лексикографическом порядке
+    """
+    if parts == 1:
+        return np.array([[total]], dtype=np.int64)
+    rows = []
+    for first in range(total + 1):
+        rest = compositions(total - first, parts - 1)
+        rows.append(np.column_stack([np.full(len(rest), first), rest]))
+    return np.vstack(rows)
+
+
+def rosters_count(count_drivers: int) -> int:
+    """
+    Число различных составов (векторов A и B) для count_drivers водителей
+    """
+    return sum(
+        len(compositions(count_a, len(START_DAYS_A)))
+        * len(compositions(count_drivers - count_a, len(START_DAYS_B)))
+        for count_a in range(count_drivers + 1)
+    )
+
+
+def on_duty_matrix(start_days: tuple[int, ...], driver_type: str) -> np.ndarray:
+    """
+    Матрица (7, число первых дней): 1, если водитель с таким первым днем
+    работает в этот день (по тем же правилам, что и drivers_on_duty)
+    """
+    matrix = np.zeros((len(DAYS), len(start_days)), dtype=np.int64)
+    for j, first_day in enumerate(start_days):
+        driver = Driver(driver_type, 0)
+        driver.first_day = first_day
+        for day in DAYS:
+            if drivers_on_duty([driver], day):
+                matrix[day, j] = 1
+    return matrix
+
+
+def make_drivers_from_counts(counts_a, counts_b) -> list[Driver]:
+    """
+    Создает водителей по числу водителей каждого типа на каждый первый день
+    """
+    drivers = []
+    for driver_type, start_days, counts in (
+        ("A", START_DAYS_A, counts_a),
+        ("B", START_DAYS_B, counts_b),
+    ):
+        for first_day, count in zip(start_days, counts):
+            for _ in range(int(count)):
+                driver = Driver(driver_type, len(drivers) + 1)
+                driver.first_day = first_day
+                drivers.append(driver)
+    return drivers
+
+
+class DayLossTable:
+    """
+    Потеря от ожидания за день для k водителей A и m водителей B на смене.
+    Водители одного типа взаимозаменяемы, а порядок дека задается
+    drivers_on_duty, поэтому день зависит только от пары (k, m).
+    Каждая пара симулируется один раз
+    """
+
+    def __init__(self, spec: ProblemSpec, simulate=simulate_day, step=None):
+        self.spec = spec
+        self.simulate = simulate
+        self.step = step or spec.peak_max_wait
+        self.size = 0
+        self.table = np.zeros((0, 0), dtype=np.int64)
+        self.simulations = 0
+
+    def day_loss(self, count_a: int, count_b: int) -> int:
+        drivers = [Driver("A", i) for i in range(count_a)]
+        drivers += [Driver("B", count_a + i) for i in range(count_b)]
+        for driver in drivers:
+            driver.first_day = 0
+        day_schedule, _ = self.simulate(
+            drivers_on_duty(drivers, 0), buses, self.spec, self.step
+        )
+        self.simulations += 1
+        return day_waiting_loss(day_schedule, self.spec)
+
+    def ensure(self, size: int) -> np.ndarray:
+        """
+        Достраивает таблицу до пар с k, m <= size
+        """
+        if size + 1 > self.size:
+            table = np.zeros((size + 1, size + 1), dtype=np.int64)
+            table[: self.size, : self.size] = self.table
+            for k in range(size + 1):
+                for m in range(size + 1):
+                    if k >= self.size or m >= self.size:
+                        table[k, m] = self.day_loss(k, m)
+            self.table = table
+            self.size = size + 1
+        return self.table
+
+
+def exhaustive_schedule(
+    num_buses: int,
+    route_duration: timedelta,
+    spec: ProblemSpec | None = None,
+    engine=generate_schedule_memo,
+    stats: dict | None = None,
+) -> tuple[WeekSchedule | None, float, list[int]]:
+    """
+    Точный перебор первых рабочих дней всех водителей
+    (в отличие от фиксированного распределения 0.4/0.3/0.3 в brute_force_schedule).
+
+    Вместо 3^n назначений перебираются только векторы числа водителей
+    каждого типа на каждый первый день - перестановки водителей одного
+    типа дают одно и то же расписание. По вектору считается, сколько
+    водителей каждого типа работает в каждый день, а потеря недели
+    складывается из потерь дней из DayLossTable. Все векторы B для
+    данного вектора A оцениваются разом через NumPy.
+    Число водителей перебирается по возрастанию с теми же отсечениями,
+    что и в brute_force_schedule. Лучший состав прогоняется через engine
+    и combined_loss, чтобы получить само расписание.
+
+    stats - счетчики: rosters - всего составов, scored - оценено,
+    pruned - отсечено по границам, day_simulations - различных дней
+    """
+    spec = (spec or DEFAULT_SPEC).replace(route_duration=to_minutes(route_duration))
+    losses = DayLossTable(spec)
+    duty_a = on_duty_matrix(START_DAYS_A, "A")
+    duty_b = on_duty_matrix(START_DAYS_B, "B")
+
+    best_loss = 100000000000000000
+    best_counts = None
+    counters = {"rosters": 0, "scored": 0, "pruned": 0}
+    for count_drivers in range(4, num_buses + 1):
+        driver_loss = drivers_lower_bound(count_drivers, spec)
+        if driver_loss >= best_loss:
+            # Дальше слагаемое за водителей только растет
+            pruned = sum(rosters_count(c) for c in range(count_drivers, num_buses + 1))
+            counters["rosters"] += pruned
+            counters["pruned"] += pruned
+            break
+        counters["rosters"] += rosters_count(count_drivers)
+
+        table = losses.ensure(count_drivers)
+        for count_a in range(count_drivers + 1):
+            vectors_a = compositions(count_a, len(START_DAYS_A))
+            vectors_b = compositions(count_drivers - count_a, len(START_DAYS_B))
+            duty_counts_b = vectors_b @ duty_b.T  # (векторы B, 7)
+            # Нижняя граница для вектора A: в каждый день лучший возможный B
+            day_floor = table[:, : count_drivers - count_a + 1].min(axis=1)
+            for vector_a in vectors_a:
+                duty_counts_a = duty_a @ vector_a
+                floor = int(day_floor[duty_counts_a].sum())
+                if spec.waiting_weight * floor + driver_loss >= best_loss:
+                    counters["pruned"] += len(vectors_b)
+                    continue
+                waiting = np.zeros(len(vectors_b), dtype=np.int64)
+                for day in DAYS:
+                    waiting += table[duty_counts_a[day], duty_counts_b[:, day]]
+                counters["scored"] += len(vectors_b)
+                best_b = int(np.argmin(waiting))
+                loss = spec.waiting_weight * int(waiting[best_b]) + driver_loss
+                if loss < best_loss:
+                    best_loss = loss
+                    best_counts = (tuple(vector_a), tuple(vectors_b[best_b]))
+
+    counters["day_simulations"] = losses.simulations
+    if stats is not None:
+        stats.update(counters)
+    if best_counts is None:
+        return None, best_loss, []
+
+    drivers = make_drivers_from_counts(*best_counts)
+    schedule = engine(drivers, buses, spec)
+    schedule_loss = combined_loss(schedule, len(drivers), spec)
+    week = WeekSchedule.from_shifts(schedule, spec, drivers)
+    return week, schedule_loss, count_per_day(drivers)
@@ -0,0 +1,156 @@
+from datetime import datetime
+
+import numpy as np
+
+from problem import DEFAULT_SPEC, ProblemSpec
+
+# Столбцы WeekSchedule.data
+COLUMNS = ("day", "driver_id", "bus_id", "minute")
+DAYS_IN_WEEK = 7
+
+
+class Departure:
+    """
+    Строка WeekSchedule - один выезд. Неизменяемая запись без __dict__,
+    вместо объектов Driver и Bus - их номера
+    """
+
+    __slots__ = ("day", "driver_id", "bus_id", "minute", "spec")
+
+    def __init__(
+        self, day: int, driver_id: int, bus_id: int, minute: int, spec: ProblemSpec
+    ):
+        for name, value in zip(self.__slots__, (day, driver_id, bus_id, minute, spec)):
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Departure не изменяется")
+
+    def __reduce__(self):
+        return Departure, tuple(getattr(self, name) for name in self.__slots__)
+
+    @property
+    def start_time(self) -> datetime:
+        return self.spec.to_datetime(self.minute)
+
+    def __str__(self):
+        start = self.start_time.strftime("%H:%M:%S")
+        return f"Водитель-{self.driver_id} Автобус-{self.bus_id} Выезд-{start}"
+
+
+class WeekSchedule:
+    """
+    Неизменяемое недельное расписание по столбцам: день, водитель, автобус
+    и минута выезда - один массив int32 только для чтения, строки
+    упорядочены по дням. Снимок не держит ссылок на Driver и Bus,
+    которые симуляция следующих кандидатов продолжает менять.
+
+    Как и list[list[Shift]], это последовательность из семи дней:
+    schedule[day] - список Departure, поэтому combined_loss
+    и display_one_day работают с ним без изменений.
+
+    roster - водители, по которым построено расписание, в порядке
+    списка drivers: (номер, тип, первый день). По ним DayReplanner
+    повторяет симуляцию дня. None - состав неизвестен
+    """
+
+    __slots__ = ("data", "bounds", "spec", "roster")
+
+    def __init__(
+        self,
+        data,
+        spec: ProblemSpec = DEFAULT_SPEC,
+        roster: tuple[tuple[int, str, int], ...] | None = None,
+    ):
+        data = np.array(data, dtype=np.int32).reshape(-1, len(COLUMNS))
+        data.flags.writeable = False
+        object.__setattr__(self, "data", data)
+        # bounds[day]:bounds[day + 1] - строки дня
+        bounds = np.searchsorted(data[:, 0], np.arange(DAYS_IN_WEEK + 1))
+        object.__setattr__(self, "bounds", bounds.tolist())
+        object.__setattr__(self, "spec", spec)
+        if roster is not None:
+            roster = tuple(tuple(driver) for driver in roster)
+        object.__setattr__(self, "roster", roster)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("WeekSchedule не изменяется")
+
+    def __reduce__(self):
+        return WeekSchedule, (self.data, self.spec, self.roster)
+
+    @classmethod
+    def from_shifts(
+        cls,
+        schedule: list[list],
+        spec: ProblemSpec = DEFAULT_SPEC,
+        drivers: list | None = None,
+    ) -> "WeekSchedule":
+        """
+        Снимок расписания из списков Shift по дням, drivers - все водители,
+        по которым оно построено
+        """
+        rows = [
+            (day, shift.driver.id, shift.bus.id, shift.minute)
+            for day, day_schedule in enumerate(schedule)
+            for shift in day_schedule
+        ]
+        roster = None
+        if drivers is not None:
+            roster = [(driver.id, driver.type, driver.first_day) for driver in drivers]
+        return cls(rows, spec, roster)
+
+    def __len__(self) -> int:
+        return DAYS_IN_WEEK
+
+    def __getitem__(self, day: int) -> list[Departure]:
+        if not -DAYS_IN_WEEK <= day < DAYS_IN_WEEK:
+            raise IndexError(day)
+        day %= DAYS_IN_WEEK
+        start, end = self.bounds[day], self.bounds[day + 1]
+        return [
+            Departure(day, driver_id, bus_id, minute, self.spec)
+            for _, driver_id, bus_id, minute in self.data[start:end].tolist()
+        ]
+
+    def __iter__(self):
+        for day in range(DAYS_IN_WEEK):
+            yield self[day]
+
+    def column(self, name: str) -> np.ndarray:
+        return self.data[:, COLUMNS.index(name)]
+
+    def rows(
+        self, day: int, driver_id: int | None = None, bus_id: int | None = None
+    ) -> list[list[int]]:
+        """
+        Строки (водитель, автобус, минута) одного дня, при необходимости
+        только одного водителя и (или) автобуса
+        """
+        rows = self.data[self.bounds[day] : self.bounds[day + 1]]
+        if driver_id is not None:
+            rows = rows[rows[:, 1] == driver_id]
+        if bus_id is not None:
+            rows = rows[rows[:, 2] == bus_id]
+        return rows[:, 1:].tolist()
+
+    def with_day(self, day: int, rows) -> "WeekSchedule":
+        """
+        Новое расписание, в котором день day заменен строками
+        (водитель, автобус, минута), остальные дни - те же
+        """
+        rows = np.array(rows, dtype=np.int32).reshape(-1, len(COLUMNS) - 1)
+        day_rows = np.column_stack([np.full(len(rows), day, dtype=np.int32), rows])
+        start, end = self.bounds[day], self.bounds[day + 1]
+        data = np.concatenate([self.data[:start], day_rows, self.data[end:]])
+        return WeekSchedule(data, self.spec, self.roster)
+
+    def to_dict(self) -> dict:
+        data = {name: self.column(name).tolist() for name in COLUMNS}
+        data["roster"] = None if self.roster is None else [*map(list, self.roster)]
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict, spec: ProblemSpec = DEFAULT_SPEC) -> "WeekSchedule":
+        rows = np.column_stack([data[name] for name in COLUMNS])
+        return cls(rows, spec, data.get("roster"))
@@ -1 +1,6 @@
 from .generative_algo import genetic_algorithm
+
+from .population import MatrixPopulation, genetic_algorithm_matrix
+from .islands import genetic_algorithm_islands
+from .local_search import local_search_algorithm, simulated_annealing, steepest_descent
+from .seeding import WarmStart, dp_schedule, dp_seeding, warm_start_gain
@@ -1,5 +1,11 @@
 import random
+import time
 from datetime import datetime, timedelta
+from functools import lru_cache
+
+from problem import DEFAULT_SPEC, ProblemSpec, ResultCache, Telemetry, to_minutes
+from problem.telemetry import phase
+
 
 
 # Классы
@@ -9,7 +15,7 @@ class Driver:
         self.id = id
 
         self.remaining_hours = 8 if driver_type == "A" else 21  # Рабочие часы для типа
-        self.next_available_time = START_TIME  # Время, когда водитель будет доступен
+        self.next_available_time = 0  # Минута, когда водитель будет доступен
         self.first_day = 1  # Первый рабочий день на неделе
         self.start_time = None
         self.route_count = 0
@@ -34,35 +40,32 @@ class Shift:
         )
 
 
-# Параметры задачи
-START_TIME = datetime.strptime("06:00", "%H:%M")
-END_TIME = datetime.strptime("03:00", "%H:%M") + timedelta(days=1)
-PEAK_HOURS = [
-    (datetime.strptime("07:00", "%H:%M"), datetime.strptime("09:00", "%H:%M")),
-    (datetime.strptime("17:00", "%H:%M"), datetime.strptime("19:00", "%H:%M")),
-]
-
+# Параметры задачи (время, часы пик, интервалы) - в ProblemSpec.
+# Время в расписании - целые минуты от начала работы
 NUM_BUSES = 15
 buses = [Bus(i) for i in range(1, NUM_BUSES)]
 
 ROUTE_DURATION = timedelta(minutes=60)
-LUNCH_DURATION = timedelta(minutes=60)
-BREAK_DURATION = timedelta(minutes=15)
-
-PEAK_MAX_WAIT = 10  # Минуты
-NON_PEAK_MAX_WAIT = 20  # Минуты
 DAYS = [i for i in range(0, 7)]
 
 POPULATION_SIZE = 20
 GENERATIONS = 100
 MUTATION_RATE = 0.1
+# Версия ответа ГА для ResultCache: увеличить, если ответ изменится
+SOLVER_VERSION = 1
+
+# Пределы адаптации операторов к разнообразию популяции
+MAX_MUTATION_RATE = 0.5
+TOURNAMENT_SIZES = (2, 3, 4)
 
 
-def generate_one_schedule(drivers: list[Driver]) -> list[tuple[int, datetime]]:
+def generate_one_schedule(
+    drivers: list[Driver], spec: ProblemSpec = DEFAULT_SPEC
+) -> list[tuple[int, int]]:
     schedule = []
-    driver_next_available = {driver.id: START_TIME for driver in drivers}
-    current_time = START_TIME
-    while current_time < END_TIME:
+    driver_next_available = {driver.id: 0 for driver in drivers}
+    current_time = 0
+    while current_time < spec.horizon:
         available_drivers = [
             driver
             for driver in drivers
@@ -73,35 +76,40 @@ def generate_one_schedule(drivers: list[Driver]) -> list[tuple[int, datetime]]:
         driver = random.choice(available_drivers)
 
         schedule.append((driver.id, current_time))
-        driver_next_available[driver.id] += ROUTE_DURATION
-        current_time += timedelta(minutes=random.choice([5, 10, 15, 20]))  # Интервалы
+        driver_next_available[driver.id] += spec.route_duration
+        current_time += random.choice([5, 10, 15, 20])  # Интервалы
     return schedule
 
 
 # Генерация начальной популяции
-def initialize_population(drivers: list[Driver]) -> list[list[tuple[int, datetime]]]:
+def initialize_population(
+    drivers: list[Driver], spec: ProblemSpec = DEFAULT_SPEC
+) -> list[list[tuple[int, int]]]:
     population = []
     for _ in range(POPULATION_SIZE):
-        schedule = generate_one_schedule(drivers)
+        schedule = generate_one_schedule(drivers, spec)
         population.append(schedule)
     return population
 
 
 # Оценка расписания (функция потерь)
-def fitness(schedule: list[tuple[int, datetime]]) -> float:
+def fitness(schedule: list[tuple[int, int]], spec: ProblemSpec = DEFAULT_SPEC) -> float:
     waiting_loss = 0
     driver_usage = {}
     if not schedule:
         return 2000000000
 
+    fitness_wait = spec.fitness_wait
     for i in range(len(schedule) - 1):
         _, time1 = schedule[i]
         _, time2 = schedule[i + 1]
-        interval = (time2 - time1).total_seconds() / 60
+        interval = time2 - time1
 
-        # Проверка на пики
-        is_peak = any(start <= time1 < end for start, end in PEAK_HOURS)
-        max_wait = 5 if is_peak else 15
+        # Проверка на пики (мутация может вывести время за рабочий день)
+        if 0 <= time1 < spec.horizon:
+            max_wait = fitness_wait[time1]
+        else:
+            max_wait = spec.ga_non_peak_max_wait
         if interval > max_wait:
             waiting_loss += (interval - max_wait) ** 2
 
@@ -118,9 +126,37 @@ def fitness(schedule: list[tuple[int, datetime]]) -> float:
     return waiting_loss + driver_loss
 
 
-def is_schedule_valid(schedule: list[tuple[int, datetime]]) -> bool:
+class FitnessCache:
     """
-    Проверяет, что водители не выезжают чаще, чем раз в час.
+    Ограниченный кэш fitness. Ключ - кортеж пар (водитель, минута),
+    поэтому одинаковые расписания (в том числе копии родителей после
+    кроссовера) оцениваются один раз
+    """
+
+    def __init__(self, spec: ProblemSpec = DEFAULT_SPEC, maxsize: int = 4096):
+        self.spec = spec
+        self.lookup = lru_cache(maxsize=maxsize)(self.evaluate)
+
+    def evaluate(self, key: tuple[tuple[int, int], ...]) -> float:
+        return fitness(key, self.spec)
+
+    def __call__(self, schedule: list[tuple[int, int]]) -> float:
+        return self.lookup(tuple(schedule))
+
+    def stats(self) -> dict:
+        info = self.lookup.cache_info()
+        return {
+            "fitness_calls": info.hits + info.misses,
+            "fitness_evaluations": info.misses,
+            "fitness_saved": info.hits,
+        }
+
+
+def is_schedule_valid(
+    schedule: list[tuple[int, int]], spec: ProblemSpec = DEFAULT_SPEC
+) -> bool:
+    """
+    Проверяет, что водители не выезжают чаще, чем раз за рейс (по умолчанию час).
     """
     if not schedule:
         return False
@@ -129,9 +165,7 @@ def is_schedule_valid(schedule: list[tuple[int, datetime]]) -> bool:
     for driver_id, departure_time in schedule:
         if driver_id in driver_last_departure:
             last_time = driver_last_departure[driver_id]
-            if (
-                departure_time - last_time
-            ).total_seconds() < 3600:  # Проверяем разницу в часах
+            if departure_time - last_time < spec.route_duration:
                 return False  # Некорректное расписание
         driver_last_departure[driver_id] = departure_time
 
@@ -140,110 +174,520 @@ def is_schedule_valid(schedule: list[tuple[int, datetime]]) -> bool:
 
 # Очистка популяции от некорректных расписаний
 def clean_population(
-    population: list[list[tuple[int, datetime]]],
+    population: list[list[tuple[int, int]]],
     drivers: list[Driver],
     max_invalid=10,
-) -> list[list[tuple[int, datetime]]]:
+    spec: ProblemSpec = DEFAULT_SPEC,
+    counters: dict | None = None,
+    repair: bool = False,
+) -> list[list[tuple[int, int]]]:
     """
     Удаляет некорректные особи из популяции и заменяет их новыми.
+    repair - вместо замены чинить особь через repair_schedule.
+    counters - offspring (проверено особей), invalid (некорректных)
     """
     valid_population = []
     invalid_count = 0
 
     for individual in population:
-        if is_schedule_valid(individual):
+        if is_schedule_valid(individual, spec):
             valid_population.append(individual)
-        elif invalid_count < max_invalid:
+            continue
+        invalid_count += 1
+        if repair:
+            repaired = repair_schedule(individual, drivers, spec)
+            if repaired:
+                valid_population.append(repaired)
+        elif invalid_count <= max_invalid:
             # Генерируем новую особь вместо некорректной
             # Берем первую особь из нового поколения
-            new_individual = generate_one_schedule(drivers)
+            new_individual = generate_one_schedule(drivers, spec)
             valid_population.append(new_individual)
-            invalid_count += 1
 
+    if counters is not None:
+        counters["offspring"] = counters.get("offspring", 0) + len(population)
+        counters["invalid"] = counters.get("invalid", 0) + invalid_count
     return valid_population
 
 
+def free_driver(
+    last_departure: dict[int, int], drivers: list[Driver], time: int, route: int
+) -> int | None:
+    """
+    Водитель, свободный к моменту time: сначала уже работавший, который
+    освободился раньше всех, затем еще не выезжавший. None - свободных нет
+    """
+    best = None
+    for driver_id, last in last_departure.items():
+        if time - last >= route and (best is None or last < last_departure[best]):
+            best = driver_id
+    if best is not None:
+        return best
+    for driver in drivers:
+        if driver.id not in last_departure:
+            return driver.id
+    return None
+
+
+# Починка расписания
+def repair_schedule(
+    schedule: list[tuple[int, int]],
+    drivers: list[Driver],
+    spec: ProblemSpec = DEFAULT_SPEC,
+) -> list[tuple[int, int]]:
+    """
+    Проходит расписание по порядку и переназначает выезды, у которых
+    водитель еще в рейсе, свободному водителю (free_driver).
+    Если свободных нет, выезд убирается. Результат проходит is_schedule_valid
+    (если не пуст)
+    """
+    repaired = []
+    last_departure = {}
+    for driver_id, minute in schedule:
+        last = last_departure.get(driver_id)
+        if last is not None and minute - last < spec.route_duration:
+            driver_id = free_driver(
+                last_departure, drivers, minute, spec.route_duration
+            )
+            if driver_id is None:
+                continue
+        last_departure[driver_id] = minute
+        repaired.append((driver_id, minute))
+    return repaired
+
+
 # Селекция (турнирный отбор)
-def selection(population: list[tuple[int, datetime]]) -> list[tuple[int, datetime]]:
+def selection(
+    population: list[list[tuple[int, int]]],
+    spec: ProblemSpec = DEFAULT_SPEC,
+    score=None,
+    k: int = 3,
+) -> list[tuple[int, int]]:
+    """
+    score - функция оценки особи (например, FitnessCache), по умолчанию fitness.
+    k - размер турнира (не больше размера популяции)
+    """
     if not population or len(population) < 3:
         return None
-    tournament = random.sample(population, k=3)
-    return min(tournament, key=fitness)
+    tournament = random.sample(population, k=min(k, len(population)))
+    score = score or (lambda individual: fitness(individual, spec))
+    return min(tournament, key=score)
 
 
 # Кроссовер (обмен расписаниями между родителями)
 def crossover(
-    parent1: list[tuple[int, datetime]], parent2: list[tuple[int, datetime]]
-) -> list[tuple[int, datetime]]:
+    parent1: list[tuple[int, int]], parent2: list[tuple[int, int]]
+) -> list[tuple[int, int]]:
     split_point = random.randint(1, len(parent1) - 1)
     child = parent1[:split_point] + parent2[split_point:]
     return child
 
 
 # Мутация (изменение времени отправления или водителя)
-def mutate(drivers: list[Driver], schedule: list[tuple[int, datetime]]) -> None:
-    if random.random() < MUTATION_RATE:
+def mutate(
+    drivers: list[Driver], schedule: list[tuple[int, int]], rate: float | None = None
+) -> None:
+    if random.random() < (MUTATION_RATE if rate is None else rate):
         index = random.randint(0, len(schedule) - 1)
         driver = random.choice(drivers)
-        new_time = schedule[index][1] + timedelta(minutes=random.choice([-5, 5, 10]))
+        new_time = schedule[index][1] + random.choice([-5, 5, 10])
         schedule[index] = (driver.id, new_time)
 
 
+# Кроссовер по времени: потомок корректен по построению
+def aligned_crossover(
+    parent1: list[tuple[int, int]],
+    parent2: list[tuple[int, int]],
+    drivers: list[Driver],
+    spec: ProblemSpec = DEFAULT_SPEC,
+) -> list[tuple[int, int]]:
+    """
+    Начало первого родителя до выезда split_point и выезды второго
+    родителя с того же времени. В отличие от crossover, на стыке нет
+    повторов и отрицательных интервалов, а конфликты водителей на стыке
+    снимает repair_schedule
+    """
+    if len(parent1) < 2:
+        return list(parent1)
+    split_point = random.randint(1, len(parent1) - 1)
+    split_time = parent1[split_point][1]
+    tail = next(
+        (j for j, (_, time) in enumerate(parent2) if time >= split_time), len(parent2)
+    )
+    return repair_schedule(parent1[:split_point] + parent2[tail:], drivers, spec)
+
+
+# Мутация только на свободного водителя
+def mutate_free_driver(
+    drivers: list[Driver],
+    schedule: list[tuple[int, int]],
+    spec: ProblemSpec = DEFAULT_SPEC,
+    rate: float | None = None,
+) -> None:
+    """
+    Как mutate, но новый водитель выбирается среди тех, у кого соседние
+    выезды отстоят от нового времени хотя бы на рейс. Если таких нет,
+    выезд не меняется
+    """
+    if random.random() < (MUTATION_RATE if rate is None else rate):
+        index = random.randint(0, len(schedule) - 1)
+        new_time = schedule[index][1] + random.choice([-5, 5, 10])
+        route = spec.route_duration
+        previous = {driver_id: time for driver_id, time in schedule[:index]}
+        following = {}
+        for driver_id, minute in reversed(schedule[index + 1 :]):
+            following[driver_id] = minute
+        free = [
+            driver.id
+            for driver in drivers
+            if new_time - previous.get(driver.id, new_time - route) >= route
+            and following.get(driver.id, new_time + route) - new_time >= route
+        ]
+        if free:
+            schedule[index] = (random.choice(free), new_time)
+
+
+# Одно поколение: отбор, кроссовер, мутация и очистка
+def next_generation(
+    population: list[list[tuple[int, int]]],
+    drivers: list[Driver],
+    spec: ProblemSpec = DEFAULT_SPEC,
+    score=None,
+    counters: dict | None = None,
+    repair: bool = False,
+    mutation_rate: float | None = None,
+    tournament_size: int = 3,
+    telemetry: Telemetry | None = None,
+) -> list[list[tuple[int, int]]]:
+    """
+    repair - операторы, сохраняющие корректность (aligned_crossover,
+    mutate_free_driver), и починка вместо замены в clean_population.
+    mutation_rate и tournament_size - параметры операторов
+    (по умолчанию MUTATION_RATE и турнир из трех).
+    telemetry - фазы selection, breeding и clean_population
+    """
+    new_population = []
+    for _ in range(POPULATION_SIZE):
+        with phase(telemetry, "selection"):
+            parent1 = selection(population, spec, score, tournament_size)
+            parent2 = selection(population, spec, score, tournament_size)
+        if not parent1 or not parent2:
+            continue
+        with phase(telemetry, "breeding"):
+            if repair:
+                child = aligned_crossover(parent1, parent2, drivers, spec)
+                mutate_free_driver(drivers, child, spec, mutation_rate)
+            else:
+                child = crossover(parent1, parent2)
+                mutate(drivers, child, mutation_rate)
+        new_population.append(child)
+
+    # Удаляем некорректные особи и заменяем их новыми
+    with phase(telemetry, "clean_population"):
+        return clean_population(
+            new_population, drivers, spec=spec, counters=counters, repair=repair
+        )
+
+
+# Адаптация операторов
+def population_diversity(population: list[list[tuple[int, int]]]) -> float:
+    """
+    Доля различных расписаний в популяции (1 - все разные)
+    """
+    if not population:
+        return 0.0
+    return len({tuple(schedule) for schedule in population}) / len(population)
+
+
+def adapt_operators(diversity: float) -> tuple[float, int]:
+    """
+    Вероятность мутации и размер турнира по разнообразию популяции:
+    чем больше одинаковых особей, тем чаще мутация и тем слабее отбор
+    """
+    mutation_rate = MUTATION_RATE + (MAX_MUTATION_RATE - MUTATION_RATE) * (
+        1 - diversity
+    )
+    if diversity < 0.5:
+        tournament_size = TOURNAMENT_SIZES[0]
+    elif diversity < 0.9:
+        tournament_size = TOURNAMENT_SIZES[1]
+    else:
+        tournament_size = TOURNAMENT_SIZES[2]
+    return mutation_rate, tournament_size
+
+
 # Основной генетический алгоритм
-def genetic_algorithm(num_buses: int, route_duration: timedelta):
+def genetic_algorithm(
+    num_buses: int,
+    route_duration: timedelta,
+    spec: ProblemSpec | None = None,
+    stats: dict | None = None,
+    repair: bool = False,
+    stagnation: int | None = None,
+    target_fitness: float | None = None,
+    time_budget: float | None = None,
+    adaptive: bool = False,
+    improve=None,
+    elites: int = 2,
+    seeding=None,
+    reach_fitness: float | None = None,
+    progress=None,
+    cancel=None,
+    seed: int | None = None,
+    cache: ResultCache | None = None,
+    telemetry: Telemetry | None = None,
+) -> list[tuple[int, datetime]]:
+    """
+    Возвращает лучшее расписание в виде пар (водитель, время выезда).
+    spec - параметры задачи (по умолчанию DEFAULT_SPEC),
+    route_duration подставляется в них.
+    stats - если передан словарь, в него записываются счетчики FitnessCache:
+    fitness_calls - обращений, fitness_evaluations - реальных вычислений,
+    fitness_saved - сэкономлено.
+    repair - операторы, сохраняющие корректность, и починка вместо замены.
+    stats также получает invalid_rate - долю некорректных потомков
+    в каждом поколении для каждого числа водителей.
+
+    Правила остановки (по умолчанию выключены):
+    stagnation - закончить число водителей, если лучший fitness не
+    улучшался столько поколений;
+    target_fitness - закончить весь поиск, когда fitness не больше этого;
+    time_budget - ограничение времени всего поиска в секундах.
+    Оставшиеся числа водителей в двух последних случаях пропускаются.
+    Оценки снизу по водителям здесь нет: fitness штрафует только реально
+    занятых водителей, а пространство поиска с ростом числа водителей
+    лишь расширяется.
+    adaptive - вероятность мутации и размер турнира каждое поколение
+    подбираются по разнообразию популяции (adapt_operators).
+    stats получает generations - число поколений для каждого числа
+    водителей (0 - пропущено), а также target_reached и timed_out.
+    improve - локальный поиск improve(schedule, drivers, spec) -> schedule
+    (например, local_search.steepest_descent), которым каждое поколение
+    улучшаются elites лучших особей.
+    stats["trace"] - пары (секунды от начала, лучший fitness) при каждом
+    улучшении общего лучшего решения.
+    seeding - источник начальных особей seeding(drivers, spec) -> список
+    расписаний (например, seeding.dp_seeding); они заменяют первые
+    случайные особи начальной популяции.
+    reach_fitness - stats["reached"] получает для каждого числа водителей
+    поколение (0 - начальная популяция), на котором лучший fitness впервые
+    стал не больше reach_fitness, или None.
+    progress - progress(count_drivers, generation, best_fitness, schedule)
+    после каждого поколения; schedule - новое лучшее расписание (как в
+    результате), если общий лучший fitness улучшился, иначе None.
+    cancel - объект с is_set() (например, threading.Event): когда он
+    установлен, поиск заканчивается, stats["cancelled"] = True.
+    seed - если задано, random.seed(seed) перед поиском.
+    cache - ResultCache (например, problem.RESULT_CACHE): ключ - параметры,
+    влияющие на ответ, вместе с seed (без seed кэш отдает ответ любого
+    прошлого запуска). Ответ из кэша возвращается сразу, progress
+    получает его один раз с generation=None, stats - только
+    result_cached. Ответ, не прерванный по времени или отмене, сохраняется.
+    telemetry - Telemetry: фазы initialize, selection, breeding,
+    clean_population, improve и evaluate, счетчики (поколения, потомки,
+    некорректные, обращения к fitness) и событие "generation"
+    (count_drivers, generation, best_fitness, offspring, invalid)
+    """
+    spec = (spec or DEFAULT_SPEC).replace(route_duration=to_minutes(route_duration))
+    cache_key = None
+    if cache is not None:
+        cache_key = cache.key(
+            "genetic",
+            SOLVER_VERSION,
+            num_buses=num_buses,
+            spec=spec,
+            seed=seed,
+            repair=repair,
+            stagnation=stagnation,
+            target_fitness=target_fitness,
+            time_budget=time_budget,
+            adaptive=adaptive,
+            improve=improve,
+            elites=elites,
+            seeding=seeding,
+        )
+        cached = cache.get(cache_key)
+        if cached is not None:
+            schedule = [
+                (driver_id, spec.to_datetime(t)) for driver_id, t in cached["schedule"]
+            ]
+            if progress is not None:
+                progress(cached["count"], None, cached["fitness"], schedule)
+            if stats is not None:
+                stats["result_cached"] = True
+            if telemetry is not None:
+                telemetry.count("result_cached")
+            return schedule
+    if seed is not None:
+        random.seed(seed)
+    started = time.perf_counter()
+    deadline = None if time_budget is None else started + time_budget
+    trace = []
+    score = FitnessCache(spec)
+    invalid_rate = {}
+    generations = {}
+    reached = {}
+    target_reached = timed_out = cancelled = False
     # Водители
     # drivers = [
     #     {"id": i + 1, "type": "A" if i < NUM_DRIVERS_A else "B"}
     #     for i in range(NUM_DRIVERS_A + NUM_DRIVERS_B)
     # ]
     best_loss = 100000000
+    best_count = None
     total_schedule = []
     for count_drivers in range(num_buses // 2, num_buses + 1):
+        generations[count_drivers] = 0
+        invalid_rate[count_drivers] = []
+        reached[count_drivers] = None
+        if target_reached or timed_out or cancelled:
+            continue
         drivers = [Driver("B", i) for i in range(1, count_drivers)]
 
-        population = initialize_population(drivers)
+        with phase(telemetry, "initialize"):
+            population = initialize_population(drivers, spec)
+            if seeding is not None:
+                seeds = seeding(drivers, spec)[:POPULATION_SIZE]
+                population[: len(seeds)] = seeds
+        if reach_fitness is not None and population:
+            if min(score(individual) for individual in population) <= reach_fitness:
+                reached[count_drivers] = 0
         best_schedule = None
         best_fitness = float("inf")
+        since_improvement = 0
+        mutation_rate, tournament_size = MUTATION_RATE, 3
         print(count_drivers, len(population))
 
         for generation in range(GENERATIONS):
-            new_population = []
-            for _ in range(POPULATION_SIZE):
-                parent1 = selection(population)
-                parent2 = selection(population)
-                if not parent1 or not parent2:
-                    continue
-                child = crossover(parent1, parent2)
-                mutate(drivers, child)
-                new_population.append(child)
-
-            # Удаляем некорректные особи и заменяем их новыми
-            population = clean_population(new_population, drivers)
+            if deadline is not None and time.perf_counter() >= deadline:
+                timed_out = True
+                break
+            if cancel is not None and cancel.is_set():
+                cancelled = True
+                break
+            if adaptive:
+                mutation_rate, tournament_size = adapt_operators(
+                    population_diversity(population)
+                )
+            counters = {"offspring": 0, "invalid": 0}
+            population = next_generation(
+                population,
+                drivers,
+                spec,
+                score,
+                counters,
+                repair,
+                mutation_rate,
+                tournament_size,
+                telemetry,
+            )
+            generations[count_drivers] += 1
+            invalid_rate[count_drivers].append(
+                counters["invalid"] / counters["offspring"]
+                if counters["offspring"]
+                else 0.0
+            )
 
             # Обновление лучшего решения
             if not population:
                 break
-            current_best = min(population, key=fitness)
-            current_fitness = fitness(current_best)
+            if improve is not None:
+                # Меметический шаг: локальный поиск на лучших особях
+                with phase(telemetry, "improve"):
+                    ranked = sorted(
+                        range(len(population)), key=lambda i: score(population[i])
+                    )
+                    for i in ranked[:elites]:
+                        population[i] = improve(population[i], drivers, spec)
+            improved = None
+            with phase(telemetry, "evaluate"):
+                current_best = min(population, key=score)
+                current_fitness = score(current_best)
             if current_fitness < best_fitness:
                 best_schedule = current_best
                 best_fitness = current_fitness
+                since_improvement = 0
+                if best_fitness < best_loss and (
+                    not trace or best_fitness < trace[-1][1]
+                ):
+                    trace.append((time.perf_counter() - started, best_fitness))
+                    improved = best_schedule
+            else:
+                since_improvement += 1
+            if reach_fitness is not None and reached[count_drivers] is None:
+                if best_fitness <= reach_fitness:
+                    reached[count_drivers] = generations[count_drivers]
+            if progress is not None:
+                progress(
+                    count_drivers,
+                    generations[count_drivers],
+                    min(best_loss, best_fitness),
+                    improved
+                    and [(driver_id, spec.to_datetime(t)) for driver_id, t in improved],
+                )
+            if telemetry is not None:
+                telemetry.count("generations")
+                telemetry.count("offspring", counters["offspring"])
+                telemetry.count("invalid", counters["invalid"])
+                telemetry.event(
+                    "generation",
+                    count_drivers=count_drivers,
+                    generation=generations[count_drivers],
+                    best_fitness=best_fitness,
+                    offspring=counters["offspring"],
+                    invalid=counters["invalid"],
+                )
 
             # print(f"Generation {generation + 1}, Best Fitness: {best_fitness}")
+            if target_fitness is not None and best_fitness <= target_fitness:
+                target_reached = True
+                break
+            if stagnation is not None and since_improvement >= stagnation:
+                break
         if best_fitness < best_loss:
             best_loss = best_fitness
+            best_count = count_drivers
             total_schedule = best_schedule
 
-    return total_schedule
+    if cache_key is not None and not timed_out and not cancelled:
+        cache.put(
+            cache_key,
+            {
+                "count": best_count,
+                "fitness": best_loss,
+                "schedule": [list(departure) for departure in total_schedule],
+            },
+        )
+
+    if telemetry is not None:
+        for name, value in score.stats().items():
+            telemetry.count(name, value)
+    if stats is not None:
+        stats.update(score.stats())
+        stats["invalid_rate"] = invalid_rate
+        stats["generations"] = generations
+        stats["target_reached"] = target_reached
+        stats["timed_out"] = timed_out
+        stats["cancelled"] = cancelled
+        stats["trace"] = trace
+        stats["reached"] = reached
+        stats["result_cached"] = False
+    return [(driver_id, spec.to_datetime(time)) for driver_id, time in total_schedule]
 
 
 def run_genetic_algo(num_buses: int, route_duration: timedelta):
     # Запуск алгоритма
     best_schedule = genetic_algorithm(num_buses, route_duration)
-    print(is_schedule_valid(best_schedule))
+    spec = DEFAULT_SPEC.replace(route_duration=to_minutes(route_duration))
+    print(
+        is_schedule_valid(
+            [(driver_id, spec.to_minutes(time)) for driver_id, time in best_schedule],
+            spec,
+        )
+    )
     print("Лучшее расписание:")
-    for driver_id, time in best_schedule:
-        print(f"Водитель {driver_id} отправляется в {time.strftime('%H:%M')}")
+    for driver_id, departure in best_schedule:
+        print(f"Водитель {driver_id} отправляется в {departure.strftime('%H:%M')}")
 
 
 if __name__ == "__main__":
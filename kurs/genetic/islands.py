@@ -0,0 +1,185 @@
+import random
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from itertools import repeat
+
+from problem import DEFAULT_SPEC, ProblemSpec, to_minutes
+
+from .generative_algo import (
+    GENERATIONS,
+    Driver,
+    FitnessCache,
+    fitness,
+    initialize_population,
+    next_generation,
+)
+
+
+class Island:
+    """
+    Остров: своя популяция для count_drivers водителей и свое состояние
+    генератора random. Состояние хранится в острове, а не в процессе,
+    поэтому результат не зависит от того, какой процесс его считал
+    """
+
+    def __init__(self, count_drivers: int, index: int, seed: int):
+        self.count_drivers = count_drivers
+        self.index = index
+        self.rng_state = random.Random(f"{seed}:{count_drivers}:{index}").getstate()
+        self.population = None
+        self.best_schedule = None
+        self.best_fitness = float("inf")
+        self.generations = 0
+        self.finished = False
+        self.fitness_calls = 0
+        self.fitness_evaluations = 0
+
+
+def evolve_island(
+    island: Island,
+    spec: ProblemSpec,
+    generations: int,
+    immigrants: list[list[tuple[int, int]]],
+) -> Island:
+    """
+    Прогоняет остров на generations поколений. immigrants - лучшие особи
+    соседнего острова, они заменяют худших особей популяции.
+    Функция модульная, чтобы ее можно было передать в пул процессов
+    """
+    drivers = [Driver("B", i) for i in range(1, island.count_drivers)]
+    score = FitnessCache(spec)
+    outer_state = random.getstate()
+    random.setstate(island.rng_state)
+    try:
+        if island.population is None:
+            island.population = initialize_population(drivers, spec)
+        elif immigrants:
+            population = sorted(island.population, key=score)
+            island.population = population[: -len(immigrants)] + immigrants
+
+        for _ in range(generations):
+            island.population = next_generation(
+                island.population, drivers, spec, score
+            )
+            island.generations += 1
+            if not island.population:
+                island.finished = True
+                break
+            current_best = min(island.population, key=score)
+            current_fitness = score(current_best)
+            if current_fitness < island.best_fitness:
+                island.best_schedule = current_best
+                island.best_fitness = current_fitness
+        island.rng_state = random.getstate()
+    finally:
+        random.setstate(outer_state)
+
+    cache_stats = score.stats()
+    island.fitness_calls += cache_stats["fitness_calls"]
+    island.fitness_evaluations += cache_stats["fitness_evaluations"]
+    return island
+
+
+def migrants_for(
+    islands: list[Island], migrants: int, spec: ProblemSpec
+) -> list[list[list[tuple[int, int]]]]:
+    """
+    Миграция по кольцу внутри одного числа водителей: остров получает
+    migrants лучших особей предыдущего острова. Между разными числами
+    водителей особи не переходят - у них разные наборы водителей
+    """
+    result = [[] for _ in islands]
+    groups = {}
+    for position, island in enumerate(islands):
+        groups.setdefault(island.count_drivers, []).append(position)
+    for positions in groups.values():
+        if len(positions) < 2:
+            continue
+        for k, position in enumerate(positions):
+            source = islands[positions[k - 1]]
+            if islands[position].finished or not source.population:
+                continue
+            best = sorted(source.population, key=lambda s: fitness(s, spec))
+            result[position] = [list(s) for s in best[:migrants]]
+    return result
+
+
+def genetic_algorithm_islands(
+    num_buses: int,
+    route_duration: timedelta,
+    spec: ProblemSpec | None = None,
+    islands_per_count: int = 2,
+    workers: int | None = 1,
+    migration_interval: int = 10,
+    migrants: int = 2,
+    seed: int | None = None,
+    stats: dict | None = None,
+) -> list[tuple[int, datetime]]:
+    """
+    Островная модель genetic_algorithm: для каждого count_drivers
+    заводится islands_per_count островов, каждый со своим потоком
+    случайных чисел (из seed, числа водителей и номера острова).
+    Острова эволюционируют эпохами по migration_interval поколений,
+    после каждой эпохи соседние острова обмениваются migrants лучшими
+    особями. В конце выбирается лучшее расписание всех островов.
+
+    workers - число процессов (1 - в текущем процессе, None - по числу ядер).
+    При фиксированном seed результат не зависит от workers.
+    stats - счетчики: islands, epochs, migrated, generations,
+    fitness_calls, fitness_evaluations
+    """
+    spec = (spec or DEFAULT_SPEC).replace(route_duration=to_minutes(route_duration))
+    if seed is None:
+        seed = random.randrange(2**32)
+    islands = [
+        Island(count_drivers, index, seed)
+        for count_drivers in range(num_buses // 2, num_buses + 1)
+        for index in range(islands_per_count)
+    ]
+    immigrants = [[] for _ in islands]
+    counters = {"islands": len(islands), "epochs": 0, "migrated": 0}
+
+    pool = ProcessPoolExecutor(max_workers=workers) if workers != 1 else None
+    mapper = pool.map if pool else map
+    try:
+        for start in range(0, GENERATIONS, migration_interval):
+            generations = min(migration_interval, GENERATIONS - start)
+            active = [
+                position
+                for position, island in enumerate(islands)
+                if not island.finished
+            ]
+            if not active:
+                break
+            evolved = mapper(
+                evolve_island,
+                [islands[position] for position in active],
+                repeat(spec),
+                repeat(generations),
+                [immigrants[position] for position in active],
+            )
+            for position, island in zip(active, evolved):
+                islands[position] = island
+            counters["epochs"] += 1
+
+            immigrants = migrants_for(islands, migrants, spec)
+            counters["migrated"] += sum(len(group) for group in immigrants)
+    finally:
+        if pool:
+            pool.shutdown()
+
+    best_loss = 100000000
+    total_schedule = []
+    for island in islands:
+        if island.best_fitness < best_loss:
+            best_loss = island.best_fitness
+            total_schedule = island.best_schedule
+
+    if stats is not None:
+        counters["generations"] = sum(island.generations for island in islands)
+        counters["fitness_calls"] = sum(island.fitness_calls for island in islands)
+        counters["fitness_evaluations"] = sum(
+            island.fitness_evaluations for island in islands
+        )
+        stats.update(counters)
+    return [(driver_id, spec.to_datetime(time)) for driver_id, time in total_schedule]
@@ -0,0 +1,275 @@
+import math
+import random
+import time
+from datetime import datetime, timedelta
+
+from problem import DEFAULT_SPEC, ProblemSpec, to_minutes
+
+from .generative_algo import (
+    Driver,
+    fitness,
+    generate_one_schedule,
+    is_schedule_valid,
+    repair_schedule,
+)
+
+# Сдвиги выезда при сглаживании интервалов и при отжиге, минуты
+SMOOTHING_SHIFTS = (-5, 5)
+ANNEALING_SHIFTS = (-10, -5, 5, 10)
+
+
+def fitness_gap(time1: int, time2: int, spec: ProblemSpec = DEFAULT_SPEC) -> int:
+    """
+    Вклад одного интервала между выездами в fitness
+    """
+    if 0 <= time1 < spec.horizon:
+        max_wait = spec.fitness_wait[time1]
+    else:
+        max_wait = spec.ga_non_peak_max_wait
+    interval = time2 - time1
+    return (interval - max_wait) ** 2 if interval > max_wait else 0
+
+
+def neighbours_valid(ids: list[int], times: list[int], index: int, route: int) -> bool:
+    """
+    Проверяет выезд index с соседними выездами того же водителя.
+    Уход прежнего водителя ограничений не нарушает
+    """
+    driver_id = ids[index]
+    before = ids[index - 1 :: -1] if index else []
+    if driver_id in before:
+        previous = index - 1 - before.index(driver_id)
+        if times[index] - times[previous] < route:
+            return False
+    if driver_id in ids[index + 1 :]:
+        following = ids.index(driver_id, index + 1)
+        if times[following] - times[index] < route:
+            return False
+    return True
+
+
+class HeadwayState:
+    """
+    Расписание для локального поиска: столбцы водителей и времен,
+    штрафы интервалов и число выездов каждого водителя (без последнего
+    выезда, как в fitness). Ход - новый водитель и время одного выезда,
+    его вклад в fitness считается по двум соседним интервалам
+    """
+
+    def __init__(self, schedule: list[tuple[int, int]], spec: ProblemSpec):
+        self.spec = spec
+        self.ids = [driver_id for driver_id, _ in schedule]
+        self.times = [time for _, time in schedule]
+        self.n = len(schedule)
+        self.waiting = sum(
+            fitness_gap(a, b, spec) for a, b in zip(self.times, self.times[1:])
+        )
+        self.counts = {}
+        for driver_id in self.ids[:-1]:
+            self.counts[driver_id] = self.counts.get(driver_id, 0) + 1
+
+    @property
+    def score(self) -> int:
+        return self.waiting + len(self.counts) ** 2
+
+    def schedule(self) -> list[tuple[int, int]]:
+        return list(zip(self.ids, self.times))
+
+    def waiting_delta(self, i: int, time: int) -> int:
+        times, spec = self.times, self.spec
+        delta = 0
+        if i > 0:
+            delta += fitness_gap(times[i - 1], time, spec)
+            delta -= fitness_gap(times[i - 1], times[i], spec)
+        if i + 1 < self.n:
+            delta += fitness_gap(time, times[i + 1], spec)
+            delta -= fitness_gap(times[i], times[i + 1], spec)
+        return delta
+
+    def delta(self, i: int, driver_id: int, time: int) -> int:
+        """
+        Изменение fitness от хода
+        """
+        delta = self.waiting_delta(i, time) if time != self.times[i] else 0
+        old_id = self.ids[i]
+        if driver_id != old_id and i < self.n - 1:
+            distinct = len(self.counts)
+            distinct -= self.counts[old_id] == 1
+            distinct += driver_id not in self.counts
+            delta += distinct**2 - len(self.counts) ** 2
+        return delta
+
+    def feasible(self, i: int, driver_id: int, time: int) -> bool:
+        """
+        Ход сохраняет порядок выездов и is_schedule_valid
+        """
+        times = self.times
+        if i > 0 and time < times[i - 1] or i + 1 < self.n and time > times[i + 1]:
+            return False
+        old_id, old_time = self.ids[i], times[i]
+        self.ids[i], times[i] = driver_id, time
+        valid = neighbours_valid(self.ids, times, i, self.spec.route_duration)
+        self.ids[i], times[i] = old_id, old_time
+        return valid
+
+    def apply(self, i: int, driver_id: int, time: int) -> None:
+        self.waiting += self.waiting_delta(i, time)
+        self.times[i] = time
+        old_id = self.ids[i]
+        if driver_id != old_id and i < self.n - 1:
+            self.counts[old_id] -= 1
+            if not self.counts[old_id]:
+                del self.counts[old_id]
+            self.counts[driver_id] = self.counts.get(driver_id, 0) + 1
+        self.ids[i] = driver_id
+
+
+def steepest_descent(
+    schedule: list[tuple[int, int]],
+    drivers: list[Driver],
+    spec: ProblemSpec = DEFAULT_SPEC,
+    max_steps: int = 100,
+    shifts: tuple[int, ...] = SMOOTHING_SHIFTS,
+    time_budget: float | None = None,
+    trace: list | None = None,
+    started: float | None = None,
+) -> list[tuple[int, int]]:
+    """
+    Сглаживание интервалов наискорейшим спуском: на каждом шаге
+    перебираются все сдвиги выездов на shifts и все замены водителя,
+    применяется лучший улучшающий ход. Останавливается, когда улучшений
+    нет, после max_steps шагов или по time_budget (секунды).
+    Некорректное расписание возвращается без изменений.
+    trace - список, куда добавляются пары (секунды от started, fitness)
+    """
+    if not is_schedule_valid(schedule, spec):
+        return schedule
+    started = time.perf_counter() if started is None else started
+    deadline = None if time_budget is None else time.perf_counter() + time_budget
+    state = HeadwayState(schedule, spec)
+    for _ in range(max_steps):
+        if deadline is not None and time.perf_counter() >= deadline:
+            break
+        best_move = None
+        best_delta = 0
+        for i in range(state.n):
+            driver_id, departure = state.ids[i], state.times[i]
+            moves = [(driver_id, departure + shift) for shift in shifts]
+            moves += [(d.id, departure) for d in drivers if d.id != driver_id]
+            for move in moves:
+                delta = state.delta(i, *move)
+                if delta < best_delta and state.feasible(i, *move):
+                    best_move = (i, *move)
+                    best_delta = delta
+        if best_move is None:
+            break
+        state.apply(*best_move)
+        if trace is not None:
+            trace.append((time.perf_counter() - started, state.score))
+    return state.schedule()
+
+
+def simulated_annealing(
+    schedule: list[tuple[int, int]],
+    drivers: list[Driver],
+    spec: ProblemSpec = DEFAULT_SPEC,
+    iterations: int = 2000,
+    t_start: float = 50.0,
+    t_end: float = 0.5,
+    shifts: tuple[int, ...] = ANNEALING_SHIFTS,
+    swap_share: float = 0.3,
+    time_budget: float | None = None,
+    rng=random,
+    trace: list | None = None,
+    started: float | None = None,
+) -> list[tuple[int, int]]:
+    """
+    Отжиг по сдвигам выездов и заменам водителей. Случайный ход
+    принимается, если не ухудшает fitness, иначе с вероятностью
+    exp(-delta / T); температура падает геометрически от t_start до t_end
+    за iterations ходов. swap_share - доля ходов-замен водителя.
+    rng - источник случайных чисел (по умолчанию модуль random).
+    Возвращает лучшее встреченное расписание, trace - как в steepest_descent
+    """
+    if not is_schedule_valid(schedule, spec):
+        return schedule
+    started = time.perf_counter() if started is None else started
+    deadline = None if time_budget is None else time.perf_counter() + time_budget
+    state = HeadwayState(schedule, spec)
+    best = state.schedule()
+    best_score = state.score
+    for k in range(iterations):
+        if deadline is not None and time.perf_counter() >= deadline:
+            break
+        temperature = t_start * (t_end / t_start) ** (k / max(1, iterations - 1))
+        i = rng.randrange(state.n)
+        if rng.random() < swap_share:
+            move = (rng.choice(drivers).id, state.times[i])
+        else:
+            move = (state.ids[i], state.times[i] + rng.choice(shifts))
+        if not state.feasible(i, *move):
+            continue
+        delta = state.delta(i, *move)
+        if delta <= 0 or rng.random() < math.exp(-delta / temperature):
+            state.apply(i, *move)
+            if state.score < best_score:
+                best = state.schedule()
+                best_score = state.score
+                if trace is not None:
+                    trace.append((time.perf_counter() - started, best_score))
+    return best
+
+
+def local_search_algorithm(
+    num_buses: int,
+    route_duration: timedelta,
+    spec: ProblemSpec | None = None,
+    iterations: int = 2000,
+    t_start: float = 50.0,
+    t_end: float = 0.5,
+    descent_steps: int = 100,
+    time_budget: float | None = None,
+    stats: dict | None = None,
+) -> list[tuple[int, datetime]]:
+    """
+    Отдельный движок вместо genetic_algorithm: для каждого числа
+    водителей случайное расписание (generate_one_schedule, затем
+    repair_schedule) улучшается отжигом и доводится наискорейшим спуском.
+    time_budget - секунды на каждое число водителей (делятся между этапами).
+    stats - trace (секунды, лучший fitness) и fitness по числам водителей
+    """
+    spec = (spec or DEFAULT_SPEC).replace(route_duration=to_minutes(route_duration))
+    stage_budget = None if time_budget is None else time_budget / 2
+    started = time.perf_counter()
+    trace = []
+    scores = {}
+
+    best_loss = 100000000
+    total_schedule = []
+    for count_drivers in range(num_buses // 2, num_buses + 1):
+        drivers = [Driver("B", i) for i in range(1, count_drivers)]
+        schedule = repair_schedule(generate_one_schedule(drivers, spec), drivers, spec)
+        if not schedule:
+            continue
+        schedule = simulated_annealing(
+            schedule,
+            drivers,
+            spec,
+            iterations,
+            t_start,
+            t_end,
+            time_budget=stage_budget,
+        )
+        schedule = steepest_descent(
+            schedule, drivers, spec, descent_steps, time_budget=stage_budget
+        )
+        scores[count_drivers] = fitness(schedule, spec)
+        if scores[count_drivers] < best_loss:
+            best_loss = scores[count_drivers]
+            total_schedule = schedule
+            trace.append((time.perf_counter() - started, best_loss))
+
+    if stats is not None:
+        stats["trace"] = trace
+        stats["fitness"] = scores
+    return [(driver_id, spec.to_datetime(time)) for driver_id, time in total_schedule]
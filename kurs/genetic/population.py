@@ -0,0 +1,311 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from problem import DEFAULT_SPEC, ProblemSpec, to_minutes
+from problem.kernels import lookup_wait, wait_arrays
+
+from .generative_algo import GENERATIONS, MUTATION_RATE, POPULATION_SIZE
+
+# Интервалы между выездами при генерации и сдвиги времени при мутации, минуты
+INTERVALS = np.array([5, 10, 15, 20])
+MUTATION_SHIFTS = np.array([-5, 5, 10])
+
+
+class MatrixPopulation:
+    """
+    Популяция в виде матриц: строка - особь, столбец - номер выезда.
+    drivers и minutes дополнены до общей ширины значением -1,
+    lengths - настоящая длина каждого расписания
+    """
+
+    def __init__(self, drivers: np.ndarray, minutes: np.ndarray, lengths: np.ndarray):
+        self.drivers = drivers
+        self.minutes = minutes
+        self.lengths = lengths
+
+    def __len__(self) -> int:
+        return len(self.lengths)
+
+    @classmethod
+    def empty(cls, size: int, width: int) -> "MatrixPopulation":
+        return cls(
+            np.full((size, width), -1, dtype=np.int32),
+            np.full((size, width), -1, dtype=np.int32),
+            np.zeros(size, dtype=np.int64),
+        )
+
+    @classmethod
+    def from_lists(
+        cls, population: list[list[tuple[int, int]]], width: int | None = None
+    ) -> "MatrixPopulation":
+        width = width or max((len(s) for s in population), default=0)
+        result = cls.empty(len(population), width)
+        for i, schedule in enumerate(population):
+            if schedule:
+                pairs = np.array(schedule, dtype=np.int32)
+                result.drivers[i, : len(schedule)] = pairs[:, 0]
+                result.minutes[i, : len(schedule)] = pairs[:, 1]
+            result.lengths[i] = len(schedule)
+        return result
+
+    def to_list(self, index: int) -> list[tuple[int, int]]:
+        length = self.lengths[index]
+        return list(
+            zip(
+                self.drivers[index, :length].tolist(),
+                self.minutes[index, :length].tolist(),
+            )
+        )
+
+    def take(self, rows: np.ndarray) -> "MatrixPopulation":
+        return MatrixPopulation(
+            self.drivers[rows], self.minutes[rows], self.lengths[rows]
+        )
+
+    def columns(self) -> np.ndarray:
+        return np.arange(self.drivers.shape[1])
+
+
+def random_population(
+    driver_ids: np.ndarray,
+    size: int,
+    width: int,
+    spec: ProblemSpec,
+    rng: np.random.Generator,
+) -> MatrixPopulation:
+    """
+    То же, что generate_one_schedule, но сразу для size особей:
+    на каждом шаге каждая особь выбирает случайного свободного водителя
+    """
+    population = MatrixPopulation.empty(size, width)
+    next_available = np.zeros((size, len(driver_ids)), dtype=np.int64)
+    current_time = np.zeros(size, dtype=np.int64)
+    active = np.ones(size, dtype=bool)
+    rows = np.arange(size)
+    for column in range(width):
+        active &= current_time < spec.horizon
+        available = next_available <= current_time[:, None]
+        active &= available.any(axis=1)
+        if not active.any():
+            break
+        # Случайный свободный водитель - максимум случайных ключей среди свободных
+        keys = np.where(available, rng.random(available.shape), -1.0)
+        choice = keys.argmax(axis=1)
+        live = rows[active]
+        population.drivers[live, column] = driver_ids[choice[live]]
+        population.minutes[live, column] = current_time[live]
+        population.lengths[live] += 1
+        next_available[live, choice[live]] = current_time[live] + spec.route_duration
+        current_time[live] += rng.choice(INTERVALS, size=len(live))
+    return population
+
+
+def batch_fitness(
+    population: MatrixPopulation, spec: ProblemSpec = DEFAULT_SPEC
+) -> np.ndarray:
+    """
+    fitness для всех особей сразу
+    """
+    _, fitness_wait = wait_arrays(spec)
+    lengths = population.lengths
+    minutes = population.minutes.astype(np.int64)
+    columns = population.columns()
+
+    gaps = minutes[:, 1:] - minutes[:, :-1]
+    max_wait = lookup_wait(fitness_wait, minutes[:, :-1], spec.ga_non_peak_max_wait)
+    over = np.maximum(gaps - max_wait, 0)
+    over[columns[None, 1:] >= lengths[:, None]] = 0
+    waiting_loss = (over * over).sum(axis=1)
+
+    # Как и в fitness, считаются водители всех выездов, кроме последнего
+    drivers = np.where(
+        columns[None, :] < lengths[:, None] - 1, population.drivers, -1
+    )
+    drivers.sort(axis=1)
+    first = np.ones(drivers.shape, dtype=bool)
+    first[:, 1:] = drivers[:, 1:] != drivers[:, :-1]
+    distinct = (first & (drivers >= 0)).sum(axis=1)
+
+    result = waiting_loss + distinct**2
+    result[lengths == 0] = 2000000000
+    return result
+
+
+def batch_valid(
+    population: MatrixPopulation, spec: ProblemSpec = DEFAULT_SPEC
+) -> np.ndarray:
+    """
+    is_schedule_valid для всех особей сразу: соседние (по порядку в
+    расписании) выезды одного водителя должны отстоять хотя бы на рейс
+    """
+    lengths = population.lengths
+    rows, positions = np.nonzero(population.columns()[None, :] < lengths[:, None])
+    drivers = population.drivers[rows, positions]
+    minutes = population.minutes[rows, positions].astype(np.int64)
+
+    order = np.lexsort((positions, drivers, rows))
+    rows, drivers, minutes = rows[order], drivers[order], minutes[order]
+    same = (rows[1:] == rows[:-1]) & (drivers[1:] == drivers[:-1])
+    too_close = same & (minutes[1:] - minutes[:-1] < spec.route_duration)
+
+    valid = lengths > 0
+    valid[rows[1:][too_close]] = False
+    return valid
+
+
+def tournament(
+    scores: np.ndarray, count: int, rng: np.random.Generator, k: int = 3
+) -> np.ndarray:
+    """
+    count турниров по k различных особей, возвращает индексы победителей
+    """
+    size = len(scores)
+    entrants = rng.integers(0, size, size=(count, k))
+    # Повторы внутри турнира перевыбираем, как random.sample
+    while True:
+        entrants.sort(axis=1)
+        repeated = (entrants[:, 1:] == entrants[:, :-1]).any(axis=1)
+        if not repeated.any():
+            break
+        entrants[repeated] = rng.integers(0, size, size=(repeated.sum(), k))
+    return entrants[np.arange(count), scores[entrants].argmin(axis=1)]
+
+
+def batch_crossover(
+    population: MatrixPopulation,
+    parents1: np.ndarray,
+    parents2: np.ndarray,
+    rng: np.random.Generator,
+) -> MatrixPopulation:
+    """
+    crossover для пар родителей: начало первого до точки разреза
+    и продолжение второго после нее
+    """
+    lengths1 = population.lengths[parents1]
+    lengths2 = population.lengths[parents2]
+    split = rng.integers(1, np.maximum(lengths1, 2))
+    from_first = population.columns()[None, :] < split[:, None]
+    return MatrixPopulation(
+        np.where(
+            from_first, population.drivers[parents1], population.drivers[parents2]
+        ),
+        np.where(
+            from_first, population.minutes[parents1], population.minutes[parents2]
+        ),
+        np.maximum(split, lengths2),
+    )
+
+
+def batch_mutate(
+    population: MatrixPopulation,
+    driver_ids: np.ndarray,
+    rng: np.random.Generator,
+    mutation_rate: float = MUTATION_RATE,
+) -> None:
+    """
+    mutate для всех особей: с вероятностью mutation_rate один выезд
+    получает случайного водителя и сдвигается по времени
+    """
+    rows = np.nonzero(
+        (rng.random(len(population)) < mutation_rate) & (population.lengths > 0)
+    )[0]
+    index = rng.integers(0, population.lengths[rows])
+    population.drivers[rows, index] = rng.choice(driver_ids, size=len(rows))
+    population.minutes[rows, index] += rng.choice(MUTATION_SHIFTS, size=len(rows))
+
+
+def clean_matrix_population(
+    population: MatrixPopulation,
+    driver_ids: np.ndarray,
+    spec: ProblemSpec,
+    rng: np.random.Generator,
+    max_invalid: int = 10,
+) -> tuple[MatrixPopulation, int]:
+    """
+    clean_population для матриц: первые max_invalid некорректных особей
+    заменяются новыми, остальные некорректные отбрасываются.
+    Возвращает популяцию и число некорректных особей
+    """
+    valid = batch_valid(population, spec)
+    invalid = np.nonzero(~valid)[0]
+    replaced = invalid[:max_invalid]
+    if len(replaced):
+        fresh = random_population(
+            driver_ids, len(replaced), population.drivers.shape[1], spec, rng
+        )
+        population.drivers[replaced] = fresh.drivers
+        population.minutes[replaced] = fresh.minutes
+        population.lengths[replaced] = fresh.lengths
+        valid[replaced] = True
+    return population.take(np.nonzero(valid)[0]), len(invalid)
+
+
+def genetic_algorithm_matrix(
+    num_buses: int,
+    route_duration: timedelta,
+    spec: ProblemSpec | None = None,
+    population_size: int = POPULATION_SIZE,
+    generations: int = GENERATIONS,
+    seed: int | None = None,
+    stats: dict | None = None,
+) -> list[tuple[int, datetime]]:
+    """
+    genetic_algorithm на матричной популяции: fitness, проверка
+    корректности, турнир, кроссовер и мутация считаются для всей
+    популяции сразу, поэтому популяции в тысячи особей работают
+    за разумное время.
+    seed - зерно numpy.random.Generator.
+    stats - счетчики: evaluations - оценено особей, invalid - некорректных детей
+    """
+    spec = (spec or DEFAULT_SPEC).replace(route_duration=to_minutes(route_duration))
+    rng = np.random.default_rng(seed)
+    # Самое длинное расписание - выезды каждые 5 минут
+    width = spec.horizon // int(INTERVALS.min()) + 1
+    counters = {"evaluations": 0, "invalid": 0}
+
+    best_loss = 100000000
+    total_schedule = []
+    for count_drivers in range(num_buses // 2, num_buses + 1):
+        driver_ids = np.arange(1, count_drivers)
+        population = random_population(driver_ids, population_size, width, spec, rng)
+        best_schedule = None
+        best_fitness = float("inf")
+        scores = batch_fitness(population, spec)
+        counters["evaluations"] += len(population)
+
+        for generation in range(generations):
+            if len(population) < 3:
+                break
+            winners = tournament(scores, 2 * population_size, rng)
+            children = batch_crossover(
+                population,
+                winners[:population_size],
+                winners[population_size:],
+                rng,
+            )
+            batch_mutate(children, driver_ids, rng)
+
+            # Удаляем некорректные особи и заменяем их новыми
+            population, invalid = clean_matrix_population(
+                children, driver_ids, spec, rng
+            )
+            counters["invalid"] += invalid
+
+            # Обновление лучшего решения
+            if not len(population):
+                break
+            scores = batch_fitness(population, spec)
+            counters["evaluations"] += len(population)
+            current = int(scores.argmin())
+            if scores[current] < best_fitness:
+                best_schedule = population.to_list(current)
+                best_fitness = scores[current]
+
+        if best_fitness < best_loss:
+            best_loss = best_fitness
+            total_schedule = best_schedule
+
+    if stats is not None:
+        stats.update(counters)
+    return [(driver_id, spec.to_datetime(time)) for driver_id, time in total_schedule]
@@ -0,0 +1,142 @@
+import random
+from datetime import timedelta
+
+import brute_force.brute_force as bf
+from problem import DEFAULT_SPEC, ProblemSpec
+from problem.timetable import optimal_timetable
+
+from .generative_algo import (
+    GENERATIONS,
+    POPULATION_SIZE,
+    Driver,
+    fitness,
+    genetic_algorithm,
+    mutate_free_driver,
+)
+
+
+def dp_schedule(
+    drivers: list[Driver], spec: ProblemSpec = DEFAULT_SPEC, step: int = 5
+) -> list[tuple[int, int]]:
+    """
+    Расписание в кодировке ГА из точного расписания выездов
+    (optimal_timetable с целевой функцией fitness). Перебирается, сколько
+    водителей занять: меньше водителей - меньше штраф за водителей,
+    но длиннее интервалы. Выезды раздаются водителям по кругу.
+    В fitness нет штрафа за недостающие выезды, поэтому без close_day
+    лучшим был бы один выезд
+    """
+    best = []
+    best_fitness = float("inf")
+    for count in range(1, len(drivers) + 1):
+        _, minutes = optimal_timetable(count, spec, "fitness", step, close_day=True)
+        schedule = [(drivers[i % count].id, minute) for i, minute in enumerate(minutes)]
+        score = fitness(schedule, spec)
+        if score < best_fitness:
+            best, best_fitness = schedule, score
+    return best
+
+
+def dp_seeding(
+    drivers: list[Driver], spec: ProblemSpec = DEFAULT_SPEC
+) -> list[list[tuple[int, int]]]:
+    """
+    Источник начальных особей для genetic_algorithm(seeding=dp_seeding)
+    """
+    schedule = dp_schedule(drivers, spec)
+    return [schedule] if schedule else []
+
+
+def brute_force_day(
+    drivers: list[Driver],
+    spec: ProblemSpec = DEFAULT_SPEC,
+    engine=bf.generate_schedule_per_day,
+) -> list[tuple[int, int]]:
+    """
+    Расписание диспетчера brute_force для тех же водителей в кодировке ГА.
+    Все водители ГА - типа B и выходят в первый день, берется этот день
+    """
+    bf_drivers = []
+    for driver in drivers:
+        bf_driver = bf.Driver("B", driver.id)
+        bf_driver.first_day = 0
+        bf_drivers.append(bf_driver)
+    schedule = engine(bf_drivers, bf.buses, spec)
+    return [(shift.driver.id, shift.minute) for shift in schedule[0]]
+
+
+class WarmStart:
+    """
+    Источник начальных особей для genetic_algorithm(seeding=WarmStart()):
+    расписание brute_force (engine - движок brute_force) и его копии,
+    каждая с moves мутациями mutate_free_driver, которые сохраняют
+    корректность. random_share популяции остается случайной
+    """
+
+    def __init__(
+        self,
+        random_share: float = 0.5,
+        moves: int = 5,
+        engine=bf.generate_schedule_per_day,
+    ):
+        self.random_share = random_share
+        self.moves = moves
+        self.engine = engine
+
+    def __call__(
+        self, drivers: list[Driver], spec: ProblemSpec = DEFAULT_SPEC
+    ) -> list[list[tuple[int, int]]]:
+        base = brute_force_day(drivers, spec, self.engine)
+        if not base:
+            return []
+        count = POPULATION_SIZE - round(POPULATION_SIZE * self.random_share)
+        seeds = [base] if count > 0 else []
+        for _ in range(count - 1):
+            schedule = list(base)
+            for _ in range(self.moves):
+                mutate_free_driver(drivers, schedule, spec, rate=1.0)
+            seeds.append(schedule)
+        return seeds
+
+
+def warm_start_gain(
+    num_buses: int,
+    route_duration: timedelta,
+    reach_fitness: float,
+    seeding=None,
+    seed: int = 0,
+    **options,
+) -> dict[int, dict[str, int]]:
+    """
+    Сравнивает genetic_algorithm без начальных особей и с seeding
+    (по умолчанию WarmStart()) при одном и том же зерне: для каждого
+    числа водителей - поколение, на котором лучший fitness впервые
+    стал не больше reach_fitness (GENERATIONS + 1, если не стал),
+    и сколько поколений сэкономлено. options передаются в genetic_algorithm
+    """
+    seeding = seeding or WarmStart()
+    reached = {}
+    outer_state = random.getstate()
+    try:
+        for name, source in (("cold", None), ("warm", seeding)):
+            random.seed(seed)
+            stats = {}
+            genetic_algorithm(
+                num_buses,
+                route_duration,
+                stats=stats,
+                seeding=source,
+                reach_fitness=reach_fitness,
+                **options,
+            )
+            reached[name] = stats["reached"]
+    finally:
+        random.setstate(outer_state)
+
+    gain = {}
+    for count_drivers, cold in reached["cold"].items():
+        cold = GENERATIONS + 1 if cold is None else cold
+        warm = reached["warm"][count_drivers]
+        warm = GENERATIONS + 1 if warm is None else warm
+        gain[count_drivers] = {"cold": cold, "warm": warm, "saved": cold - warm}
+    return gain
@@ -0,0 +1,3 @@
+from .results import RESULT_CACHE, ResultCache
+from .spec import DEFAULT_SPEC, ProblemSpec, to_minutes
+from .telemetry import Telemetry
@@ -0,0 +1,113 @@
+from functools import lru_cache
+
+import numpy as np
+
+from .spec import DEFAULT_SPEC, ProblemSpec
+
+
+@lru_cache(maxsize=32)
+def wait_arrays(spec: ProblemSpec) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Таблицы spec.loss_wait и spec.fitness_wait в виде массивов NumPy
+    """
+    return (
+        np.asarray(spec.loss_wait, dtype=np.int64),
+        np.asarray(spec.fitness_wait, dtype=np.int64),
+    )
+
+
+def lookup_wait(
+    table: np.ndarray, minutes: np.ndarray, non_peak_wait: int
+) -> np.ndarray:
+    """
+    Максимальный интервал для каждой минуты. Время вне рабочего дня
+    (после мутаций в ГА) считается непиковым
+    """
+    inside = (minutes >= 0) & (minutes < len(table))
+    return np.where(inside, table[np.clip(minutes, 0, len(table) - 1)], non_peak_wait)
+
+
+def overshoot_loss(gaps: np.ndarray, max_wait: np.ndarray) -> int:
+    """
+    Сумма квадратов превышения интервалов над допустимыми
+    """
+    over = np.maximum(gaps - max_wait, 0)
+    return int(np.dot(over, over))
+
+
+def schedule_to_arrays(schedule) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Переводит недельное расписание из Shift в плоский массив минут
+    выездов и массив числа выездов по дням
+    """
+    day_lengths = np.fromiter((len(day) for day in schedule), dtype=np.int64)
+    minutes = np.fromiter(
+        (shift.minute for day in schedule for shift in day),
+        dtype=np.int64,
+        count=int(day_lengths.sum()),
+    )
+    return minutes, day_lengths
+
+
+def combined_loss_array(
+    minutes: np.ndarray,
+    day_lengths: np.ndarray,
+    drivers_count: int,
+    spec: ProblemSpec = DEFAULT_SPEC,
+) -> float:
+    """
+    То же, что brute_force.combined_loss, но за один векторный проход.
+    minutes - минуты выездов всех дней подряд, day_lengths - число выездов по дням
+    """
+    loss_wait, _ = wait_arrays(spec)
+    missing = np.maximum(spec.min_departures - day_lengths, 0)
+    waiting_loss = int(missing.sum()) * spec.missing_penalty
+
+    if len(minutes) > 1:
+        gaps = np.diff(minutes)
+        max_wait = lookup_wait(loss_wait, minutes[:-1], spec.non_peak_max_wait)
+        # Интервалы между последним выездом дня и первым выездом следующего не считаются
+        same_day = np.ones(len(gaps), dtype=bool)
+        day_ends = np.cumsum(day_lengths)[:-1] - 1
+        same_day[day_ends[(day_ends >= 0) & (day_ends < len(gaps))]] = False
+        waiting_loss += overshoot_loss(gaps[same_day], max_wait[same_day])
+
+    driver_loss = drivers_count**2
+    return spec.waiting_weight * waiting_loss + spec.driver_weight * driver_loss
+
+
+def fitness_array(
+    driver_ids: np.ndarray, minutes: np.ndarray, spec: ProblemSpec = DEFAULT_SPEC
+) -> float:
+    """
+    То же, что generative_algo.fitness, но по массивам водителей и минут выездов
+    """
+    if len(minutes) == 0:
+        return 2000000000
+    _, fitness_wait = wait_arrays(spec)
+    gaps = np.diff(minutes)
+    max_wait = lookup_wait(fitness_wait, minutes[:-1], spec.ga_non_peak_max_wait)
+    waiting_loss = overshoot_loss(gaps, max_wait)
+    # Как и в fitness, учитываются водители всех выездов, кроме последнего
+    driver_loss = len(np.unique(driver_ids[:-1])) ** 2
+    return waiting_loss + driver_loss
+
+
+def combined_loss_fast(
+    schedule, drivers_count: int, spec: ProblemSpec = DEFAULT_SPEC
+) -> float:
+    """
+    Замена brute_force.combined_loss с той же сигнатурой
+    """
+    minutes, day_lengths = schedule_to_arrays(schedule)
+    return combined_loss_array(minutes, day_lengths, drivers_count, spec)
+
+
+def fitness_fast(schedule: list[tuple[int, int]], spec: ProblemSpec = DEFAULT_SPEC):
+    """
+    Замена generative_algo.fitness с той же сигнатурой
+    """
+    if not schedule:
+        return 2000000000
+    pairs = np.array(schedule, dtype=np.int64)
+    return fitness_array(pairs[:, 0], pairs[:, 1], spec)
@@ -0,0 +1,150 @@
+import gzip
+import hashlib
+import json
+import os
+from datetime import timedelta
+from functools import partial
+
+from .spec import ProblemSpec
+
+# Каталог кэша по умолчанию, можно переопределить переменной окружения
+CACHE_DIR = os.environ.get(
+    "SCHEDULE_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "schedules")
+)
+SUFFIX = ".json.gz"
+
+
+def describe(value):
+    """
+    Входные данные решателя в виде json: ProblemSpec - его параметры,
+    функции - полное имя (partial - вместе с аргументами),
+    прочие объекты - имя класса и атрибуты
+    """
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, timedelta):
+        return value.total_seconds()
+    if isinstance(value, ProblemSpec):
+        return describe(value.params)
+    if isinstance(value, (list, tuple)):
+        return [describe(item) for item in value]
+    if isinstance(value, dict):
+        return {str(name): describe(item) for name, item in value.items()}
+    if isinstance(value, partial):
+        return [describe(value.func), describe(value.args), describe(value.keywords)]
+    if hasattr(value, "__qualname__"):
+        return f"{value.__module__}.{value.__qualname__}"
+    name = f"{type(value).__module__}.{type(value).__qualname__}"
+    return [name, describe(vars(value))]
+
+
+class ResultCache:
+    """
+    Кэш решенных расписаний на диске, общий для запусков и процессов.
+    Файл на каждый ключ: имя решателя и sha256 от версии решателя
+    и всех его входных данных. Значение - сжатый json.
+    max_bytes - предел суммарного размера, при превышении удаляются
+    давно не использованные файлы (чтение обновляет время изменения)
+    """
+
+    def __init__(self, directory: str = CACHE_DIR, max_bytes: int = 64 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, solver: str, version: int, **inputs) -> str:
+        payload = json.dumps(
+            [version, describe(inputs)], sort_keys=True, separators=(",", ":")
+        )
+        return f"{solver}-{hashlib.sha256(payload.encode()).hexdigest()}"
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, key + SUFFIX)
+
+    def get(self, key: str):
+        path = self.path(key)
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as file:
+                value = json.load(file)
+            os.utime(path)
+        except (OSError, ValueError):
+            # Нет файла или он поврежден - как промах
+            self.misses += 1
+            return None
+        self.hits += 1
+        return value
+
+    def put(self, key: str, value) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path(key)
+        # Запись через временный файл, чтобы другой процесс не прочитал половину
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with gzip.open(temporary, "wt", encoding="utf-8") as file:
+            json.dump(value, file, separators=(",", ":"))
+        os.replace(temporary, path)
+        self.evict()
+
+    def entries(self) -> list[tuple[float, int, str]]:
+        """
+        Файлы кэша: (время использования, размер, путь)
+        """
+        entries = []
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return entries
+        for name in names:
+            if not name.endswith(SUFFIX):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                info = os.stat(path)
+            except OSError:
+                continue
+            entries.append((info.st_mtime, info.st_size, path))
+        return entries
+
+    def evict(self) -> None:
+        entries = sorted(self.entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+
+    def invalidate(self, key: str | None = None, solver: str | None = None) -> int:
+        """
+        Удаляет один ключ, все записи решателя solver или, без
+        аргументов, весь кэш. Возвращает число удаленных файлов
+        """
+        removed = 0
+        for _, _, path in self.entries():
+            name = os.path.basename(path)[: -len(SUFFIX)]
+            if key is not None and name != key:
+                continue
+            if solver is not None and not name.startswith(solver + "-"):
+                continue
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            removed += 1
+        return removed
+
+    def stats(self) -> dict:
+        entries = self.entries()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(entries),
+            "bytes": sum(size for _, size, _ in entries),
+        }
+
+
+# Кэш по умолчанию
+RESULT_CACHE = ResultCache()
@@ -0,0 +1,116 @@
+from datetime import datetime, timedelta
+
+
+def parse_clock(value: str) -> datetime:
+    return datetime.strptime(value, "%H:%M")
+
+
+def to_minutes(duration: timedelta | int) -> int:
+    """
+    Переводит длительность в целые минуты
+    """
+    if isinstance(duration, timedelta):
+        return int(duration.total_seconds() // 60)
+    return int(duration)
+
+
+class ProblemSpec:
+    """
+    Параметры задачи, один раз скомпилированные в целые минуты
+    от начала работы. Симуляция, функции потерь и fitness работают
+    только с этими числами и таблицами по минутам,
+    а datetime нужен только для вывода
+    """
+
+    def __init__(
+        self,
+        start_time: str = "06:00",
+        end_time: str = "03:00",
+        peak_hours: tuple = (("07:00", "09:00"), ("17:00", "19:00")),
+        route_duration: int = 60,
+        lunch_duration: int = 60,
+        break_duration: int = 15,
+        peak_max_wait: int = 10,
+        non_peak_max_wait: int = 20,
+        ga_peak_max_wait: int = 5,
+        ga_non_peak_max_wait: int = 15,
+        min_departures: int = 60,
+        missing_penalty: int = 1000,
+        driver_weight: float = 10.0,
+        waiting_weight: float = 4.0,
+    ):
+        self.params = {
+            "start_time": start_time,
+            "end_time": end_time,
+            "peak_hours": tuple(tuple(window) for window in peak_hours),
+            "route_duration": to_minutes(route_duration),
+            "lunch_duration": to_minutes(lunch_duration),
+            "break_duration": to_minutes(break_duration),
+            "peak_max_wait": peak_max_wait,
+            "non_peak_max_wait": non_peak_max_wait,
+            "ga_peak_max_wait": ga_peak_max_wait,
+            "ga_non_peak_max_wait": ga_non_peak_max_wait,
+            "min_departures": min_departures,
+            "missing_penalty": missing_penalty,
+            "driver_weight": driver_weight,
+            "waiting_weight": waiting_weight,
+        }
+        for name, value in self.params.items():
+            setattr(self, name, value)
+        # Хэшируемый ключ для кэшей: одинаковые параметры - одинаковый ключ
+        self.key = tuple(self.params.items())
+
+        # Время начала работы - это минута 0, конец работы - на следующие сутки
+        self.start = parse_clock(start_time)
+        end = parse_clock(end_time)
+        if end <= self.start:
+            end += timedelta(days=1)
+        self.horizon = self.to_minutes(end)
+
+        self.peak_windows = [
+            (self.to_minutes(parse_clock(start)), self.to_minutes(parse_clock(end)))
+            for start, end in self.params["peak_hours"]
+        ]
+        # Симулятор считает пиковым и выезд, который закончится в час пик
+        self.dispatch_windows = self.peak_windows + [
+            (start - self.route_duration, end - self.route_duration)
+            for start, end in self.peak_windows
+        ]
+
+        # Таблицы максимального интервала для каждой минуты рабочего дня
+        self.loss_wait = self.wait_table(
+            self.peak_windows, peak_max_wait, non_peak_max_wait
+        )
+        self.dispatch_wait = self.wait_table(
+            self.dispatch_windows, peak_max_wait, non_peak_max_wait
+        )
+        self.fitness_wait = self.wait_table(
+            self.peak_windows, ga_peak_max_wait, ga_non_peak_max_wait
+        )
+
+    def wait_table(
+        self, windows: list[tuple[int, int]], peak_wait: int, non_peak_wait: int
+    ) -> list[int]:
+        table = [non_peak_wait] * self.horizon
+        for start, end in windows:
+            for minute in range(max(start, 0), min(end, self.horizon)):
+                table[minute] = peak_wait
+        return table
+
+    def is_peak(self, minute: int) -> bool:
+        return any(start <= minute < end for start, end in self.peak_windows)
+
+    def to_minutes(self, time: datetime) -> int:
+        return int((time - self.start).total_seconds() // 60)
+
+    def to_datetime(self, minute: int) -> datetime:
+        return self.start + timedelta(minutes=minute)
+
+    def replace(self, **changes) -> "ProblemSpec":
+        """
+        Новая задача с измененными параметрами
+        """
+        return ProblemSpec(**{**self.params, **changes})
+
+
+DEFAULT_SPEC = ProblemSpec()
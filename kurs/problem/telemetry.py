@@ -0,0 +1,79 @@
+import json
+import time
+from contextlib import nullcontext
+
+
+class Timer:
+    """
+    Контекст замера одной фазы
+    """
+
+    __slots__ = ("telemetry", "name", "started")
+
+    def __init__(self, telemetry: "Telemetry", name: str):
+        self.telemetry = telemetry
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.telemetry.add_time(self.name, time.perf_counter() - self.started)
+        return False
+
+
+class Telemetry:
+    """
+    Замеры решателя: время и число входов по фазам, счетчики и события.
+    Решатели принимают telemetry=None и без него ничего не замеряют.
+    callback(kind, data) получает каждое событие: kind - "generation"
+    в genetic_algorithm, "candidate" и "row" в brute_force_iter
+    """
+
+    def __init__(self, callback=None):
+        self.callback = callback
+        self.seconds = {}
+        self.calls = {}
+        self.counters = {}
+
+    def phase(self, name: str) -> Timer:
+        return Timer(self, name)
+
+    def add_time(self, name: str, seconds: float) -> None:
+        self.seconds[name] = self.seconds.get(name, 0.0) + seconds
+        self.calls[name] = self.calls.get(name, 0) + 1
+
+    def count(self, name: str, value: int = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def event(self, kind: str, **data) -> None:
+        self.count(f"{kind}_events")
+        if self.callback is not None:
+            self.callback(kind, data)
+
+    def to_dict(self) -> dict:
+        return {
+            "phases": {
+                name: {"seconds": seconds, "calls": self.calls[name]}
+                for name, seconds in self.seconds.items()
+            },
+            "counters": dict(self.counters),
+        }
+
+    def summary(self, limit: int = 3) -> str:
+        """
+        Самые долгие фазы одной строкой
+        """
+        slowest = sorted(self.seconds.items(), key=lambda item: -item[1])[:limit]
+        return ", ".join(f"{name} {seconds:.2f}s" for name, seconds in slowest)
+
+    def to_json(self, **options) -> str:
+        return json.dumps(self.to_dict(), ensure_ascii=False, **options)
+
+
+def phase(telemetry: Telemetry | None, name: str):
+    """
+    telemetry.phase(name) или пустой контекст, если замеров нет
+    """
+    return nullcontext() if telemetry is None else telemetry.phase(name)
@@ -0,0 +1,133 @@
+import math
+from functools import lru_cache
+
+import numpy as np
+
+from .kernels import wait_arrays
+from .spec import DEFAULT_SPEC, ProblemSpec
+
+# Целевые функции: таблица интервалов и учитывается ли штраф за нехватку выездов
+OBJECTIVES = ("loss", "fitness")
+
+
+def min_headway(capacity: int, spec: ProblemSpec, step: int) -> int:
+    """
+    Наименьший интервал (кратный step), при котором capacity водителей
+    и автобусов по кругу всегда успевают вернуться из рейса
+    """
+    headway = math.ceil(spec.route_duration / capacity)
+    return max(step, math.ceil(headway / step) * step)
+
+
+@lru_cache(maxsize=256)
+def optimal_timetable(
+    capacity: int,
+    spec: ProblemSpec = DEFAULT_SPEC,
+    objective: str = "loss",
+    step: int = 5,
+    max_gap: int | None = None,
+    close_day: bool = False,
+) -> tuple[int, tuple[int, ...]]:
+    """
+    Точное расписание выездов на один день динамическим программированием.
+
+    Выезды стоят на сетке step минут, первый - в начале работы, последний -
+    в любой точке сетки: интервал после него в стоимость не входит.
+    close_day - последний выезд только в последней точке сетки до конца
+    работы (как у особей ГА, которые покрывают весь день). Интервалы не короче
+    min_headway(capacity): тогда выезд i можно отдать водителю и автобусу
+    i % capacity. Стоимость дня:
+    objective="loss" - как в combined_loss (spec.loss_wait и штраф
+    missing_penalty за каждый недостающий до min_departures выезд),
+    objective="fitness" - интервалы из fitness (spec.fitness_wait).
+
+    Состояние - (точка сетки последнего выезда, число выездов); число
+    выездов нужно только до min_departures, дальше они не различаются.
+    max_gap - самый длинный рассматриваемый интервал в минутах
+    (по умолчанию с запасом: два наибольших допустимых интервала плюс
+    min_headway - более длинный интервал выгодно разбить).
+
+    Возвращает невзвешенную стоимость и минуты выездов
+    """
+    if objective not in OBJECTIVES:
+        raise ValueError(f"Неизвестная целевая функция: {objective}")
+    if objective == "loss":
+        wait, _ = wait_arrays(spec)
+        min_departures = spec.min_departures
+    else:
+        _, wait = wait_arrays(spec)
+        min_departures = 0
+    if capacity <= 0:
+        return min_departures * spec.missing_penalty, ()
+
+    headway = min_headway(capacity, spec, step)
+    if max_gap is None:
+        max_gap = 2 * int(wait.max()) + headway
+    points = (spec.horizon - 1) // step + 1
+    first_gap = headway // step
+    last_gap = max(first_gap, min(max_gap // step, points - 1))
+    grid_wait = wait[::step][:points]
+    # cost[g][j] - штраф интервала в g шагов, начинающегося в точке j
+    cost = {
+        g: np.maximum(g * step - grid_wait, 0) ** 2
+        for g in range(first_gap, last_gap + 1)
+    }
+
+    # Слой c - ровно c + 1 выездов, последний слой - не меньше layers выездов
+    layers = max(1, min_departures)
+    best = np.full((layers, points), np.inf)
+    gaps = np.zeros((layers, points), dtype=np.int64)
+    best[0, 0] = 0
+    for c in range(1, layers):
+        for g, gap_cost in cost.items():
+            candidate = best[c - 1, :-g] + gap_cost[:-g]
+            better = candidate < best[c, g:]
+            best[c, g:][better] = candidate[better]
+            gaps[c, g:][better] = g
+
+    # В последнем слое выезды добавляются без смены слоя - проход по времени
+    last = layers - 1
+    row = best[last].tolist()
+    row_gaps = gaps[last].tolist()
+    stays = [False] * points
+    cost_lists = {g: gap_cost.tolist() for g, gap_cost in cost.items()}
+    for i in range(points):
+        for g, gap_cost in cost_lists.items():
+            if g > i:
+                break
+            candidate = row[i - g] + gap_cost[i - g]
+            if candidate < row[i]:
+                row[i] = candidate
+                row_gaps[i] = g
+                stays[i] = True
+
+    # Лучшая точка последнего выезда в каждом слое
+    finals = best.copy()
+    finals[last] = row
+    if close_day:
+        finals[:, :-1] = np.inf
+    ends = np.argmin(finals, axis=1)
+    totals = finals[np.arange(layers), ends]
+    totals += spec.missing_penalty * np.maximum(
+        0, min_departures - np.arange(1, layers + 1)
+    )
+    layer = int(np.argmin(totals))
+    if not np.isfinite(totals[layer]):
+        return min_departures * spec.missing_penalty, ()
+
+    # Восстановление выездов с конца
+    minutes = []
+    i = int(ends[layer])
+    while True:
+        minutes.append(i * step)
+        if i == 0:
+            break
+        if layer == last:
+            g = row_gaps[i]
+            if not stays[i]:
+                layer -= 1
+        else:
+            g = int(gaps[layer, i])
+            layer -= 1
+        i -= g
+    return int(totals.min()), tuple(reversed(minutes))
@@ -0,0 +1,235 @@
+"""
+Пакетный прогон решателя по списку сценариев без интерфейса.
+
+    python sweep.py scenarios.json -o results/ --jobs 4
+
+Файл сценариев - json: список сценариев или объект с ключами
+defaults (общие поля), grid (поле -> список значений, берутся все
+сочетания) и scenarios (список). Сценарий - buses, route (минуты),
+solver (brute_force или genetic), необязательные name, seed
+и time_budget, а остальные поля - параметры ProblemSpec
+(peak_hours, driver_weight, waiting_weight, ...).
+
+Сценарии решаются в пуле процессов, и результат каждого пишется
+в output/<имя>.json, как только он готов. Имя - name или хэш полей
+сценария, поэтому при повторном запуске сценарии с готовым файлом
+пропускаются, и прерванный прогон продолжается с того же места
+"""
+
+import argparse
+import contextlib
+import hashlib
+import itertools
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import timedelta
+
+import brute_force.brute_force as bf
+import genetic.generative_algo as ga
+from problem import DEFAULT_SPEC, RESULT_CACHE
+
+SOLVERS = ("brute_force", "genetic")
+# Поля сценария, которые не относятся к ProblemSpec
+OPTIONS = ("name", "buses", "route", "solver", "seed", "time_budget")
+# Остальные поля - параметры ProblemSpec, длительность рейса задается route
+SPEC_FIELDS = set(DEFAULT_SPEC.params) - {"route_duration"}
+
+
+def load_scenarios(path: str) -> list[dict]:
+    with open(path, encoding="utf-8") as file:
+        data = json.load(file)
+    if isinstance(data, list):
+        data = {"scenarios": data}
+    defaults = data.get("defaults", {})
+    scenarios = [{**defaults, **scenario} for scenario in data.get("scenarios", [])]
+    grid = data.get("grid")
+    if grid:
+        for values in itertools.product(*grid.values()):
+            scenarios.append({**defaults, **dict(zip(grid, values))})
+    for scenario in scenarios:
+        check_scenario(scenario)
+    return scenarios
+
+
+def check_scenario(scenario: dict) -> None:
+    """
+    Ошибки в файле сценариев находятся до запуска, а не в середине прогона
+    """
+    for field in ("buses", "route"):
+        if field not in scenario:
+            raise ValueError(f"В сценарии нет {field}: {scenario}")
+    if scenario.get("solver", SOLVERS[0]) not in SOLVERS:
+        raise ValueError(f"Неизвестный решатель: {scenario['solver']}")
+    unknown = set(scenario) - set(OPTIONS) - SPEC_FIELDS
+    if unknown:
+        raise ValueError(f"Неизвестные поля {sorted(unknown)}: {scenario}")
+    scenario_spec(scenario)
+
+
+def scenario_spec(scenario: dict):
+    params = {name: value for name, value in scenario.items() if name in SPEC_FIELDS}
+    return DEFAULT_SPEC.replace(route_duration=scenario["route"], **params)
+
+
+def scenario_name(scenario: dict) -> str:
+    if "name" in scenario:
+        return str(scenario["name"])
+    payload = json.dumps(scenario, sort_keys=True, separators=(",", ":"))
+    solver = scenario.get("solver", SOLVERS[0])
+    return f"{solver}-{hashlib.sha256(payload.encode()).hexdigest()[:16]}"
+
+
+class NoSolution(RuntimeError):
+    """
+    Решатель не нашел ни одного расписания (например, кончился time_budget)
+    """
+
+
+def solve(scenario: dict, cache: bool = False) -> dict:
+    """
+    Решает один сценарий. Выполняется в процессе пула.
+    NoSolution, если расписания нет: такой сценарий считается ошибкой,
+    файл не пишется, и при повторном запуске он решается заново
+    """
+    spec = scenario_spec(scenario)
+    route = timedelta(minutes=scenario["route"])
+    stats = {}
+    started = time.perf_counter()
+    # Решатели печатают ход поиска, а stdout нужен для хода прогона
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        if scenario.get("solver", SOLVERS[0]) == "brute_force":
+            schedule, loss, count = bf.brute_force_schedule(
+                scenario["buses"],
+                route,
+                stats=stats,
+                spec=spec,
+                time_budget=scenario.get("time_budget"),
+                cache=RESULT_CACHE if cache else None,
+            )
+            if schedule is None:
+                raise no_solution(stats)
+            result = {"loss": loss, "count": count, "schedule": schedule.to_dict()}
+        else:
+            schedule = ga.genetic_algorithm(
+                scenario["buses"],
+                route,
+                spec=spec,
+                stats=stats,
+                time_budget=scenario.get("time_budget"),
+                seed=scenario.get("seed"),
+                cache=RESULT_CACHE if cache else None,
+            )
+            if not schedule:
+                raise no_solution(stats)
+            minutes = [
+                (driver_id, spec.to_minutes(time)) for driver_id, time in schedule
+            ]
+            result = {
+                "fitness": ga.fitness(minutes, spec),
+                "drivers": len({driver_id for driver_id, _ in minutes}),
+                "schedule": [list(departure) for departure in minutes],
+            }
+    result["wall"] = time.perf_counter() - started
+    result["stats"] = stats
+    return result
+
+
+def no_solution(stats: dict) -> NoSolution:
+    reason = "кончилось время" if stats.get("timed_out") else "расписание не найдено"
+    return NoSolution(f"Нет решения: {reason}")
+
+
+def write_result(output: str, name: str, value: dict) -> None:
+    path = os.path.join(output, name + ".json")
+    # Запись через временный файл: прерванный прогон не оставит половину файла
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "w", encoding="utf-8") as file:
+        json.dump(value, file, ensure_ascii=False)
+    os.replace(temporary, path)
+
+
+def run_sweep(
+    scenarios: list[dict],
+    output: str,
+    jobs: int | None = None,
+    cache: bool = False,
+    verbose: bool = True,
+) -> tuple[int, int, int]:
+    """
+    Решает сценарии без готового файла в output.
+    Возвращает (решено, пропущено, с ошибкой)
+    """
+    os.makedirs(output, exist_ok=True)
+    names = set()
+    pending = {}
+    for scenario in scenarios:
+        name = scenario_name(scenario)
+        if name in names:
+            raise ValueError(f"Сценарий {name} повторяется")
+        names.add(name)
+        if not os.path.exists(os.path.join(output, name + ".json")):
+            pending[name] = scenario
+    skipped = len(scenarios) - len(pending)
+    if verbose and skipped:
+        print(f"Пропущено готовых: {skipped}", file=sys.stderr)
+
+    done = failed = 0
+    pool = ProcessPoolExecutor(max_workers=jobs)
+    try:
+        futures = {
+            pool.submit(solve, scenario, cache): name
+            for name, scenario in pending.items()
+        }
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                result = future.result()
+            except Exception as error:
+                # Файл не пишется, и при следующем запуске сценарий повторится
+                failed += 1
+                print(f"{name}: ошибка {error!r}", file=sys.stderr)
+                continue
+            write_result(output, name, {"scenario": pending[name], **result})
+            done += 1
+            if verbose:
+                quality = result.get("loss", result.get("fitness"))
+                print(
+                    f"[{done + failed}/{len(pending)}] {name}"
+                    f" quality={quality} wall={result['wall']:.2f}s",
+                    file=sys.stderr,
+                )
+    finally:
+        # При прерывании не ждем сценарии из очереди - они решатся при повторе
+        pool.shutdown(cancel_futures=True)
+    return done, skipped, failed
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("scenarios", help="файл сценариев json")
+    parser.add_argument("-o", "--output", required=True, help="каталог результатов")
+    parser.add_argument(
+        "--jobs", type=int, default=None, help="число процессов (по умолчанию - ядер)"
+    )
+    parser.add_argument(
+        "--cache", action="store_true", help="брать и сохранять ответы в RESULT_CACHE"
+    )
+    args = parser.parse_args(argv)
+
+    scenarios = load_scenarios(args.scenarios)
+    try:
+        done, skipped, failed = run_sweep(
+            scenarios, args.output, args.jobs, args.cache
+        )
+    except KeyboardInterrupt:
+        print("Прервано, повторный запуск продолжит с того же места")
+        return 130
+    print(f"Решено: {done}, пропущено: {skipped}, с ошибкой: {failed}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,39 @@
+from datetime import timedelta
+
+import pytest
+
+from brute_force import (
+    brute_force_schedule,
+    generate_schedule_events,
+    generate_schedule_memo,
+)
+
+CASES = [(n, route) for n in (8, 10, 12) for route in (60, 90)]
+# Все режимы обещают тот же ответ, что и обычный последовательный перебор
+MODES = {
+    "workers=2": {"workers": 2},
+    "workers=3": {"workers": 3},
+    "bound=False": {"bound": False},
+    "bound=False, workers=2": {"bound": False, "workers": 2},
+    "events": {"engine": generate_schedule_events},
+    "memo": {"engine": generate_schedule_memo},
+    "memo, workers=2": {"engine": generate_schedule_memo, "workers": 2},
+}
+
+
+def solve(num_buses: int, route: int, **options):
+    schedule, loss, count = brute_force_schedule(
+        num_buses, timedelta(minutes=route), **options
+    )
+    return loss, count, schedule.data.tolist()
+
+
+@pytest.fixture(scope="module")
+def baseline() -> dict:
+    return {case: solve(*case) for case in CASES}
+
+
+@pytest.mark.parametrize("mode", MODES)
+@pytest.mark.parametrize("case", CASES)
+def test_same_answer_as_serial(baseline, case, mode):
+    assert solve(*case, **MODES[mode]) == baseline[case]
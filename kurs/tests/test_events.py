@@ -0,0 +1,43 @@
+import pytest
+
+from brute_force.brute_force import (
+    Bus,
+    generate_schedule_per_day,
+    make_drivers,
+)
+from brute_force.events import generate_schedule_events
+from problem import DEFAULT_SPEC
+
+BUSES = [Bus(i) for i in range(1, 50)]
+
+
+def departures(schedule) -> list:
+    return [
+        [(shift.driver.id, shift.bus.id, shift.minute) for shift in day]
+        for day in schedule
+    ]
+
+
+@pytest.mark.parametrize("step", [1, 5, 7, 10])
+@pytest.mark.parametrize("route", [30, 45, 60, 90, 125])
+def test_events_engine_matches_ticks(step, route):
+    spec = DEFAULT_SPEC.replace(route_duration=route)
+    for count_drivers in range(4, 26, 3):
+        for count_drivers_a in range(count_drivers + 1):
+            ticks = generate_schedule_per_day(
+                make_drivers(count_drivers, count_drivers_a), BUSES, spec, step=step
+            )
+            events = generate_schedule_events(
+                make_drivers(count_drivers, count_drivers_a), BUSES, spec, step=step
+            )
+            assert departures(events) == departures(ticks)
+
+
+def test_events_engine_loss_limit():
+    spec = DEFAULT_SPEC
+    for limit in (0, 1000, 100000, 10**9):
+        ticks = generate_schedule_per_day(make_drivers(12, 6), BUSES, spec, limit)
+        events = generate_schedule_events(make_drivers(12, 6), BUSES, spec, limit)
+        assert (events is None) == (ticks is None)
+        if ticks is not None:
+            assert departures(events) == departures(ticks)
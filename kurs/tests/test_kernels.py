@@ -0,0 +1,74 @@
+import random
+
+import pytest
+
+from brute_force.brute_force import (
+    Bus,
+    Shift,
+    combined_loss,
+    generate_schedule_per_day,
+    make_drivers,
+)
+from genetic.generative_algo import (
+    Driver,
+    crossover,
+    fitness,
+    generate_one_schedule,
+    mutate,
+)
+from problem import DEFAULT_SPEC
+from problem.kernels import combined_loss_fast, fitness_fast
+
+SPECS = [DEFAULT_SPEC, DEFAULT_SPEC.replace(route_duration=90, waiting_weight=1.0)]
+
+
+@pytest.mark.parametrize("spec", SPECS)
+@pytest.mark.parametrize("count_drivers, count_drivers_a", [(4, 2), (20, 10), (40, 25)])
+def test_combined_loss_brute_force(spec, count_drivers, count_drivers_a):
+    drivers = make_drivers(count_drivers, count_drivers_a)
+    buses = [Bus(i) for i in range(1, 50)]
+    schedule = generate_schedule_per_day(drivers, buses, spec)
+    assert combined_loss_fast(schedule, count_drivers, spec) == combined_loss(
+        schedule, count_drivers, spec
+    )
+
+
+def test_combined_loss_empty_days():
+    driver = make_drivers(1, 1)[0]
+    bus = Bus(1)
+    schedules = [
+        [[] for _ in range(7)],
+        [[Shift(driver, bus, 0)]] + [[] for _ in range(6)],
+        [[] for _ in range(3)] + [[Shift(driver, bus, 120)]] + [[] for _ in range(3)],
+    ]
+    for schedule in schedules:
+        assert combined_loss_fast(schedule, 1) == combined_loss(schedule, 1)
+
+
+def ga_schedules(spec, count: int = 30):
+    random.seed(0)
+    drivers = [Driver("B", i) for i in range(1, 15)]
+    population = [generate_one_schedule(drivers, spec) for _ in range(count)]
+    schedules = list(population)
+    for _ in range(count):
+        child = crossover(*random.sample(population, 2))
+        schedules.append(list(child))
+        # Мутации выводят время за рабочий день и ломают порядок выездов
+        for _ in range(10):
+            mutate(drivers, child, rate=1.0)
+        schedules.append(child)
+    return schedules
+
+
+@pytest.mark.parametrize("spec", SPECS)
+def test_fitness_ga_schedules(spec):
+    for schedule in ga_schedules(spec):
+        assert fitness_fast(schedule, spec) == fitness(schedule, spec)
+
+
+@pytest.mark.parametrize(
+    "schedule",
+    [[], [(1, 0)], [(1, -30)], [(1, 0), (2, 100)], [(1, 1250), (1, 1300)]],
+)
+def test_fitness_short_schedules(schedule):
+    assert fitness_fast(schedule) == fitness(schedule)
@@ -0,0 +1,110 @@
+import pickle
+from datetime import timedelta
+
+import pytest
+
+from brute_force import (
+    BUS_OUT_OF_SERVICE,
+    DRIVER_UNAVAILABLE,
+    ROUTE_DELAY,
+    DayReplanner,
+    Disruption,
+    WeekSchedule,
+    brute_force_schedule,
+    exhaustive_schedule,
+    replan_day,
+)
+
+DAY = 2
+
+
+@pytest.fixture(scope="module")
+def week() -> WeekSchedule:
+    schedule, _, _ = brute_force_schedule(20, timedelta(minutes=60))
+    return schedule
+
+
+def on_trip(week: WeekSchedule, index: int = 20) -> tuple[int, int, int, int]:
+    """
+    Водитель и автобус выезда index дня DAY и момент, когда они еще в рейсе
+    """
+    driver_id, bus_id, minute = week.rows(DAY)[index]
+    return driver_id, bus_id, minute, minute + 10
+
+
+def before(rows: list, now: int) -> list:
+    return [row for row in rows if row[2] < now]
+
+
+def after(rows: list, now: int) -> list:
+    return [row for row in rows if row[2] >= now]
+
+
+def assert_rest_unchanged(week: WeekSchedule, new: WeekSchedule, now: int):
+    assert before(new.rows(DAY), now) == before(week.rows(DAY), now)
+    for day in range(7):
+        if day != DAY:
+            assert new.rows(day) == week.rows(day)
+    assert new.roster == week.roster
+
+
+def test_solver_result_carries_roster(week):
+    assert week.roster is not None
+    assert WeekSchedule.from_dict(week.to_dict(), week.spec).roster == week.roster
+    assert pickle.loads(pickle.dumps(week)).roster == week.roster
+    assert exhaustive_schedule(20, timedelta(minutes=60))[0].roster is not None
+
+
+def test_no_change_keeps_schedule(week):
+    _, _, _, now = on_trip(week)
+    new = replan_day(week, DAY, now, Disruption(ROUTE_DELAY, delay=0))
+    assert (new.data == week.data).all()
+
+
+def test_driver_unavailable(week):
+    driver_id, _, _, now = on_trip(week)
+    new = replan_day(week, DAY, now, Disruption(DRIVER_UNAVAILABLE, driver_id))
+    assert_rest_unchanged(week, new, now)
+    assert driver_id in [row[0] for row in after(week.rows(DAY), now)]
+    assert driver_id not in [row[0] for row in after(new.rows(DAY), now)]
+
+
+def test_bus_out_of_service(week):
+    _, bus_id, _, now = on_trip(week)
+    new = replan_day(week, DAY, now, Disruption(BUS_OUT_OF_SERVICE, bus_id))
+    assert_rest_unchanged(week, new, now)
+    assert bus_id not in [row[1] for row in after(new.rows(DAY), now)]
+
+
+def test_route_delay(week):
+    _, bus_id, departed, now = on_trip(week)
+    delay = 120
+    new = replan_day(week, DAY, now, Disruption(ROUTE_DELAY, bus_id, delay))
+    assert_rest_unchanged(week, new, now)
+    returned = departed + week.spec.route_duration + delay
+    # Автобус в рейсе не выезжает снова, пока не вернется с опозданием
+    assert all(
+        minute >= returned
+        for _, bus, minute in after(new.rows(DAY), now)
+        if bus == bus_id
+    )
+
+
+def test_events_accumulate(week):
+    driver_id, _, _, now = on_trip(week)
+    _, bus_id, _, later = on_trip(week, 25)
+    replanner = DayReplanner(week, DAY)
+    first = replanner.replan(now, Disruption(DRIVER_UNAVAILABLE, driver_id))
+    second = replanner.replan(later, Disruption(BUS_OUT_OF_SERVICE, bus_id))
+    assert before(second.rows(DAY), later) == before(first.rows(DAY), later)
+    assert driver_id not in [row[0] for row in after(second.rows(DAY), now)]
+    assert bus_id not in [row[1] for row in after(second.rows(DAY), later)]
+    with pytest.raises(ValueError):
+        replanner.replan(now, Disruption(ROUTE_DELAY, delay=5))
+
+
+def test_errors(week):
+    with pytest.raises(ValueError):
+        replan_day(week, DAY, 300, Disruption(BUS_OUT_OF_SERVICE, 999))
+    with pytest.raises(ValueError):
+        DayReplanner(WeekSchedule(week.data, week.spec), DAY)
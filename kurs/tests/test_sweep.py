@@ -0,0 +1,29 @@
+import json
+
+import pytest
+
+import sweep
+
+SCENARIO = {"buses": 8, "route": 45}
+
+
+@pytest.mark.parametrize("solver", sweep.SOLVERS)
+def test_no_solution_is_not_a_result(solver):
+    with pytest.raises(sweep.NoSolution):
+        sweep.solve({**SCENARIO, "solver": solver, "time_budget": 0})
+
+
+def test_timed_out_scenario_is_retried(tmp_path):
+    scenarios = [
+        {**SCENARIO, "name": "solved"},
+        {**SCENARIO, "name": "timed_out", "time_budget": 0},
+    ]
+    counts = sweep.run_sweep(scenarios, str(tmp_path), jobs=1, verbose=False)
+    assert counts == (1, 0, 1)
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["solved.json"]
+    result = json.loads((tmp_path / "solved.json").read_text(encoding="utf-8"))
+    assert result["schedule"]["minute"] and not result["stats"]["timed_out"]
+
+    # Готовый сценарий пропускается, сценарий без решения решается заново
+    counts = sweep.run_sweep(scenarios, str(tmp_path), jobs=1, verbose=False)
+    assert counts == (0, 1, 1)
@@ -0,0 +1,67 @@
+import itertools
+
+import pytest
+
+from problem import ProblemSpec
+from problem.timetable import min_headway, optimal_timetable
+
+# Короткий день: 12 точек сетки по 10 минут, один час пик
+SPEC = ProblemSpec(
+    start_time="06:00",
+    end_time="08:00",
+    peak_hours=(("06:30", "07:00"),),
+    route_duration=30,
+    ga_peak_max_wait=10,
+    ga_non_peak_max_wait=20,
+    min_departures=8,
+    missing_penalty=50,
+)
+STEP = 10
+
+
+def day_cost(minutes, objective):
+    """
+    Стоимость дня по определению, без динамического программирования
+    """
+    if objective == "loss":
+        wait, min_departures = SPEC.loss_wait, SPEC.min_departures
+    else:
+        wait, min_departures = SPEC.fitness_wait, 0
+    cost = SPEC.missing_penalty * max(0, min_departures - len(minutes))
+    for start, end in zip(minutes, minutes[1:]):
+        cost += max(end - start - wait[start], 0) ** 2
+    return cost
+
+
+def best_by_enumeration(capacity, objective, close_day):
+    """
+    Перебор всех наборов выездов с первым выездом в начале работы
+    """
+    points = range(0, SPEC.horizon, STEP)
+    headway = min_headway(capacity, SPEC, STEP)
+    best = None
+    for mask in itertools.product((False, True), repeat=len(points) - 1):
+        minutes = [0] + [minute for minute, on in zip(points[1:], mask) if on]
+        if close_day and minutes[-1] != points[-1]:
+            continue
+        if any(end - start < headway for start, end in zip(minutes, minutes[1:])):
+            continue
+        cost = day_cost(minutes, objective)
+        best = cost if best is None else min(best, cost)
+    return best
+
+
+@pytest.mark.parametrize("close_day", [False, True])
+@pytest.mark.parametrize("objective", ["loss", "fitness"])
+@pytest.mark.parametrize("capacity", [1, 2, 3])
+def test_optimal_timetable_matches_enumeration(capacity, objective, close_day):
+    cost, minutes = optimal_timetable(
+        capacity, SPEC, objective, STEP, close_day=close_day
+    )
+    assert cost == best_by_enumeration(capacity, objective, close_day)
+    assert cost == day_cost(list(minutes), objective)
+    assert minutes[0] == 0
+    if close_day:
+        assert minutes[-1] == SPEC.horizon - STEP
+    headway = min_headway(capacity, SPEC, STEP)
+    assert all(end - start >= headway for start, end in zip(minutes, minutes[1:]))
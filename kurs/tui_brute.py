@@ -1,99 +1,207 @@
+import asyncio
+import multiprocessing
+import time
 from datetime import timedelta
 
+from textual import work
 from textual.app import App, ComposeResult
 from textual.widgets import (
     Static,
     Button,
     Header,
-    Log,
+    Input,
     TabbedContent,
-    Markdown,
     TabPane,
     DataTable,
 )
-from textual.containers import Horizontal, Middle
+from textual.containers import Horizontal
 
 import brute_force
-
-schedule, _, _ = brute_force.brute_force_schedule(20, timedelta(minutes=60))
-
-
-class Week(Static):
-
-    days = ["MN", "TUE", "WED", "TH", "FR", "SAT", "SUN"]
-
-    def on_button_pressed(self, event: Button.Pressed) -> None:
-        content_widget = self.query_one("#content", Log)
-        # content_widget.update(self.days[int(event.button.id[1])])
-        content_widget.write_line(
-            brute_force.display_one_day(schedule[int(event.button.id[1]) - 1])
-        )
-
-    def compose(self):
-        yield Middle(
-            Static("Выберите день недели", id="systext"),
-            Horizontal(
-                Button("ПН", id="p0"),
-                Button("ВТ", id="p1"),
-                Button("СР", id="p2"),
-                Button("ЧТ", id="p3"),
-                Button("ПТ", id="p4"),
-                Button("СБ", id="p5"),
-                Button("ВС", id="p6"),
-            ),
-            Log("", id="content"),
-        )
+from background import run_solver
+from problem import DEFAULT_SPEC, RESULT_CACHE, Telemetry, to_minutes
+
+NUM_BUSES = 20
+ROUTE_DURATION = timedelta(minutes=60)
+# Как часто (секунды) процесс расчета присылает прогресс
+PROGRESS_INTERVAL = 0.1
+# Сколько строк добавляется в таблицу за один проход цикла событий
+ROWS_PER_CHUNK = 200
+DAY_NAMES = ("ПН", "ВТ", "СР", "ЧТ", "ПТ", "СБ", "ВС")
+
+
+def solve_schedule(send, cancel, num_buses: int, route_duration: timedelta) -> None:
+    """
+    Расчет для run_solver: сообщения ("progress", водителей, из них A,
+    лучшая потеря) не чаще PROGRESS_INTERVAL и ("schedule", потеря,
+    массив WeekSchedule.data) при каждом улучшении: один массив
+    передавать дешевле, чем объекты Shift.
+    В конце - ("telemetry", самые долгие фазы)
+    """
+    last_update = 0.0
+
+    def progress(count_drivers, count_drivers_a, loss):
+        nonlocal last_update
+        now = time.perf_counter()
+        if now - last_update >= PROGRESS_INTERVAL:
+            last_update = now
+            send(("progress", count_drivers, count_drivers_a, loss))
+
+    telemetry = Telemetry()
+    for loss, schedule, _ in brute_force.brute_force_iter(
+        num_buses,
+        route_duration,
+        progress=progress,
+        cancel=cancel,
+        cache=RESULT_CACHE,
+        telemetry=telemetry,
+    ):
+        send(("schedule", loss, schedule.data))
+    send(("telemetry", telemetry.summary()))
 
 
 class CalendarApp(App):
-    """Приложение для отображения TUI-календаря с расписанием автобусов."""
+    """Приложение для отображения TUI-календаря с расписанием автобусов.
+    Расписание считается в отдельном процессе. Таблица дня создается
+    при первом открытии вкладки и заполняется частями по ROWS_PER_CHUNK
+    строк; при новом расписании или фильтре заполняется заново
+    только открытая вкладка"""
+
+    CSS = """
+    #controls {
+        height: auto;
+    }
+    #controls Input {
+        width: 20;
+    }
+    TabbedContent, ContentSwitcher, TabPane, DataTable {
+        height: 1fr;
+    }
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.spec = DEFAULT_SPEC.replace(route_duration=to_minutes(ROUTE_DURATION))
+        self.schedule = None
+        self.shown = set()  # Дни, чьи таблицы соответствуют schedule и фильтрам
+        self.driver_filter = None
+        self.bus_filter = None
+        self.cancel = multiprocessing.Event()
+        self.state = ""
+        self.best_loss = None
+
+    def on_mount(self) -> None:
+        self.solve()
 
     def on_button_pressed(self, event: Button.Pressed) -> None:
         if event.button.id == "exit":
+            self.cancel.set()
             self.exit()
             return
+        elif event.button.id == "cancel":
+            self.cancel.set()
+
+    async def on_input_changed(self, event: Input.Changed) -> None:
+        value = int(event.value) if event.value.lstrip("-").isdigit() else None
+        if event.input.id == "driver":
+            self.driver_filter = value
+        else:
+            self.bus_filter = value
+        self.shown.clear()
+        await self.show_day(self.active_day())
+
+    async def on_tabbed_content_tab_activated(
+        self, event: TabbedContent.TabActivated
+    ) -> None:
+        await self.show_day(int(event.pane.id[1:]) - 1)
+
+    @work(thread=True, exclusive=True)
+    def solve(self) -> None:
+        run_solver(
+            solve_schedule,
+            (NUM_BUSES, ROUTE_DURATION),
+            lambda message: self.call_from_thread(self.show_message, message),
+            self.cancel,
+        )
+        self.call_from_thread(self.show_done)
+
+    async def show_message(self, message) -> None:
+        if message[0] == "progress":
+            _, count_drivers, count_drivers_a, _ = message
+            self.state = f"Водителей: {count_drivers}"
+            if count_drivers_a is not None:
+                self.state += f" (A: {count_drivers_a})"
+        elif message[0] == "telemetry":
+            self.query_one("#telemetry", Static).update(message[1])
+        else:
+            _, self.best_loss, data = message
+            self.schedule = brute_force.WeekSchedule(data, self.spec)
+            self.shown.clear()
+            await self.show_day(self.active_day())
+        self.show_progress()
+
+    def show_done(self) -> None:
+        self.state = "Отменено" if self.cancel.is_set() else "Готово"
+        self.query_one("#cancel", Button).disabled = True
+        self.show_progress()
+
+    def show_progress(self) -> None:
+        loss = "-" if self.best_loss is None else f"{self.best_loss:.0f}"
+        self.query_one("#progress", Static).update(
+            f"{self.state} | Лучшая потеря: {loss}"
+        )
 
-    def generate_table(self, day):
-        table = DataTable()
-        table.add_columns("Водитель", "Автобус", "Выезд")
-        for s in schedule[day]:
-            table.add_row(s.driver.id, s.bus.id, s.start_time.strftime("%H:%M"))
-        return table
+    def active_day(self) -> int:
+        return int(self.query_one(TabbedContent).active[1:]) - 1
+
+    async def show_day(self, day: int) -> None:
+        if day in self.shown:
+            return
+        pane = self.query_one(f"#p{day + 1}", TabPane)
+        tables = pane.query(DataTable)
+        if tables:
+            table = tables.first()
+        else:
+            table = DataTable(id=f"day{day}")
+            table.add_columns("Водитель", "Автобус", "Выезд")
+            await pane.mount(table)
+        self.shown.add(day)
+        self.fill_table(table, day)
+
+    @work(exclusive=True, group="fill")
+    async def fill_table(self, table: DataTable, day: int) -> None:
+        rows = []
+        if self.schedule is not None:
+            rows = self.schedule.rows(day, self.driver_filter, self.bus_filter)
+        table.clear()
+        try:
+            for start in range(0, len(rows), ROWS_PER_CHUNK):
+                chunk = rows[start : start + ROWS_PER_CHUNK]
+                table.add_rows(
+                    (driver_id, bus_id, self.spec.to_datetime(minute).strftime("%H:%M"))
+                    for driver_id, bus_id, minute in chunk
+                )
+                # Отдаем управление, чтобы интерфейс не замирал на больших днях
+                await asyncio.sleep(0)
+        except asyncio.CancelledError:
+            # Заполнение прервано другим - таблицу придется заполнить заново
+            self.shown.discard(day)
+            raise
 
     def compose(self) -> ComposeResult:
         yield Header()
+        yield Static("Расчет...", id="progress")
+        yield Static("", id="telemetry")
+        yield Horizontal(
+            Button("Отменить", id="cancel"),
+            Button("Выйти", id="exit"),
+            Input(placeholder="Водитель", type="integer", id="driver"),
+            Input(placeholder="Автобус", type="integer", id="bus"),
+            id="controls",
+        )
         yield Static("Выберите день недели")
-        yield Button("Выйти", id="exit")
         with TabbedContent():
-            with TabPane("ПН", id="p1"):
-                yield self.generate_table(0)
-            with TabPane("ВТ", id="p2"):
-                yield self.generate_table(1)
-            with TabPane("СР", id="p3"):
-                yield self.generate_table(2)
-            with TabPane("ЧТ", id="p4"):
-                yield self.generate_table(3)
-            with TabPane("ПТ", id="p5"):
-                yield self.generate_table(4)
-            with TabPane("СБ", id="p6"):
-                yield self.generate_table(5)
-            with TabPane("ВС", id="p7"):
-                yield self.generate_table(6)
-        # yield Horizontal(
-        #     Button("ПН", id="p0"),
-        #     Button("ВТ", id="p1"),
-        #     Button("СР", id="p2"),
-        #     Button("ЧТ", id="p3"),
-        #     Button("ПТ", id="p4"),
-        #     Button("СБ", id="p5"),
-        #     Button("ВС", id="p6"),
-        # )
-        # yield Log("", id="content")
-
-    # def on_button_pressed(self, event: Button.Pressed) -> None:
-    #     """Обработка нажатия кнопки."""
-    #     if event.button.id == "show-schedule":
-    #         self.query_one("#main-container").mount(ScheduleWidget())
+            for day, name in enumerate(DAY_NAMES):
+                yield TabPane(name, id=f"p{day + 1}")
 
 
 if __name__ == "__main__":
@@ -1,5 +1,8 @@
+import multiprocessing
+import time
 from datetime import timedelta
 
+from textual import work
 from textual.app import App, ComposeResult
 from textual.widgets import (
     Static,
@@ -13,11 +16,46 @@ from textual.containers import Horizontal, Middle, Vertical, Container
 
 import brute_force
 
+from background import run_solver
 from genetic import genetic_algorithm
+from problem import RESULT_CACHE, Telemetry
+
+# Как часто (секунды) процесс расчета присылает прогресс
+PROGRESS_INTERVAL = 0.1
+
+
+def solve_schedule(send, cancel, num_buses: int, route_duration: int) -> None:
+    """
+    Расчет для run_solver: сообщения ("progress", водителей, поколение,
+    лучший fitness, расписание) - с расписанием при каждом улучшении,
+    без него (None) не чаще PROGRESS_INTERVAL. В конце -
+    ("telemetry", самые долгие фазы)
+    """
+    last_update = 0.0
+
+    def progress(count_drivers, generation, best_fitness, schedule):
+        nonlocal last_update
+        now = time.perf_counter()
+        if schedule is not None or now - last_update >= PROGRESS_INTERVAL:
+            last_update = now
+            send(("progress", count_drivers, generation, best_fitness, schedule))
+
+    telemetry = Telemetry()
+    genetic_algorithm(
+        num_buses,
+        timedelta(minutes=route_duration),
+        progress=progress,
+        cancel=cancel,
+        cache=RESULT_CACHE,
+        telemetry=telemetry,
+    )
+    send(("telemetry", telemetry.summary()))
 
 
 class CalendarApp(App):
-    """Приложение для отображения TUI-календаря с расписанием автобусов."""
+    """Приложение для отображения TUI-календаря с расписанием автобусов.
+    Генетический алгоритм работает в отдельном процессе, таблица обновляется
+    при каждом улучшении"""
 
     CSS = """
     #main-container {
@@ -28,29 +66,82 @@ class CalendarApp(App):
     }
     """
 
+    def __init__(self):
+        super().__init__()
+        self.cancel = multiprocessing.Event()
+        self.state = None
+
     def on_button_pressed(self, event: Button.Pressed):
-        container = self.query_one("#main-container", Vertical)
         if event.button.id == "exit":
+            self.cancel.set()
             self.exit()
             return
         elif event.button.id == "calc":
-            content = self.query_one("#content", DataTable).clear()
-            self.update_table()
+            # Предыдущий расчет останавливается, новый получает свой флаг
+            self.cancel.set()
+            self.cancel = multiprocessing.Event()
+            self.state = None
+            self.query_one("#content", DataTable).clear()
+            self.query_one("#cancel", Button).disabled = False
+            self.solve(
+                int(self.query_one("#nb", Input).value),
+                int(self.query_one("#rd", Input).value),
+                self.cancel,
+            )
+        elif event.button.id == "cancel":
+            self.cancel.set()
 
     def generate_table(self):
         table = DataTable(id="content")
         table.add_columns("Водитель", "Выезд")
         return table
 
-    def update_table(self):
-        table = self.query_one("#content", DataTable)
-        num_buses = self.query_one("#nb", Input).value
-        route_duration = self.query_one("#rd", Input).value
-        schedule = genetic_algorithm(
-            int(num_buses), timedelta(minutes=int(route_duration))
+    @work(thread=True, exclusive=True)
+    def solve(self, num_buses: int, route_duration: int, cancel) -> None:
+        run_solver(
+            solve_schedule,
+            (num_buses, route_duration),
+            lambda message: self.call_from_thread(self.show_message, message, cancel),
+            cancel,
         )
-        if not schedule:
-            return table
+        self.call_from_thread(self.show_done, cancel)
+
+    def show_message(self, message, cancel) -> None:
+        # Сообщения отмененного расчета, пришедшие после нового нажатия
+        if cancel is not self.cancel:
+            return
+        if message[0] == "telemetry":
+            self.query_one("#telemetry", Static).update(message[1])
+            return
+        _, *self.state, schedule = message
+        if schedule is not None:
+            self.update_table(schedule)
+        self.show_progress()
+
+    def show_done(self, cancel) -> None:
+        if cancel is not self.cancel:
+            return
+        self.query_one("#cancel", Button).disabled = True
+        self.show_progress("Отменено" if cancel.is_set() else "Готово")
+
+    def show_progress(self, done: str | None = None) -> None:
+        if self.state is None:
+            text = "Нет расписания"
+        else:
+            count_drivers, generation, best_fitness = self.state
+            # Ответ из кэша приходит без номера поколения
+            generation = "из кэша" if generation is None else generation
+            text = (
+                f"Водителей: {count_drivers} | Поколение: {generation}"
+                f" | Лучший fitness: {best_fitness}"
+            )
+        if done:
+            text = f"{done} | {text}"
+        self.query_one("#progress", Static).update(text)
+
+    def update_table(self, schedule):
+        table = self.query_one("#content", DataTable)
+        table.clear()
         for s in schedule:
             table.add_row(s[0], s[1].strftime("%H:%M"))
         return table
@@ -62,7 +153,10 @@ class CalendarApp(App):
         yield Container(
             Vertical(
                 Button("Рассчитать", id="calc"),
+                Button("Отменить", id="cancel", disabled=True),
                 Button("Выйти", id="exit"),
+                Static("", id="progress"),
+                Static("", id="telemetry"),
                 self.generate_table(),
                 id="main-container",
             )